@@ -1,16 +1,18 @@
 import os
+import time
 import streamlit as st
-import openai
+from llm_client import get_client
+from chat_context import build_api_messages, new_summary
 from dotenv import load_dotenv
 
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
 
-# Initialize OpenAI client
-client = openai.OpenAI(
-    api_key=API_KEY,
-    base_url="https://api.poe.com/v1",
-)
+# Cheaper model used to fold old messages into the rolling summary
+SUMMARY_MODEL = "gpt-3.5-turbo"
+
+# Shared, pooled OpenAI client (reused across reruns)
+client = get_client(API_KEY)
 
 # Page configuration
 st.set_page_config(page_title="AI Chat App", page_icon="💬", layout="wide")
@@ -61,12 +63,51 @@ with st.sidebar:
         index=0
     )
     
+    # Streaming shows the reply word by word instead of waiting for all of it
+    stream_responses = st.toggle("Stream responses", value=True, help="Show the reply as it is being written")
+    
     # Clear chat button
     st.divider()
     if st.button("🗑️ Clear Chat", use_container_width=True):
         st.session_state.messages = []
+        st.session_state.context_summary = new_summary()
+        st.session_state.context_stats = []
         st.rerun()
 
+
+def stream_reply(stream, timing):
+    """Yield text pieces from a streaming response.
+
+    The stream is always closed at the end, including when Streamlit stops the
+    script mid-reply (Stop button or a new message), so the connection is freed.
+    """
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                if "first_token" not in timing:
+                    timing["first_token"] = time.perf_counter() - timing["start"]
+                yield text
+    finally:
+        stream.close()
+
+
+def summarize_turns(previous_summary, turns):
+    """Fold older chat messages into the running conversation summary."""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+    response = client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": "You maintain a running summary of a conversation between a user and an AI assistant. Keep names, facts, decisions and open questions. Be concise."},
+            {"role": "user", "content": f"Current summary:\n{previous_summary or '(none yet)'}\n\nNew messages:\n{transcript}\n\nReturn the updated summary in under 200 words."}
+        ],
+        stream=False
+    )
+    return response.choices[0].message.content.strip()
+
+
 # Main chat interface
 st.title("💬 AI Chat App")
 st.caption("Chat with an AI assistant. Customize its personality using the sidebar.")
@@ -75,6 +116,12 @@ st.caption("Chat with an AI assistant. Customize its personality using the sideb
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Rolling summary of messages that no longer fit, and per-turn token counts
+if "context_summary" not in st.session_state:
+    st.session_state.context_summary = new_summary()
+if "context_stats" not in st.session_state:
+    st.session_state.context_stats = []
+
 # Display chat messages
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
@@ -87,33 +134,69 @@ if prompt := st.chat_input("Type your message here..."):
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Prepare messages for API call
-    api_messages = []
-    
-    # Add system prompt if provided
-    if system_prompt and system_prompt.strip():
-        api_messages.append({"role": "system", "content": system_prompt.strip()})
-    
-    # Add conversation history
-    for msg in st.session_state.messages:
-        api_messages.append({"role": msg["role"], "content": msg["content"]})
+    # Prepare messages for API call: system prompt + recent turns within the model's budget
+    api_messages, st.session_state.context_summary, context_stats = build_api_messages(
+        system_prompt,
+        st.session_state.messages,
+        model,
+        st.session_state.context_summary,
+        summarize_turns,
+    )
+    st.session_state.context_stats.append(context_stats)
     
     # Get AI response
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
+        if stream_responses:
+            timing = {"start": time.perf_counter()}
             try:
-                response = client.chat.completions.create(
+                stream = client.chat.completions.create(
                     model=model,
                     messages=api_messages,
-                    stream=False
+                    stream=True
                 )
-                ai_response = response.choices[0].message.content
-                st.markdown(ai_response)
+                # write_stream renders the markdown as it arrives and returns the full text
+                ai_response = st.write_stream(stream_reply(stream, timing))
+                total_time = time.perf_counter() - timing["start"]
+                if "first_token" in timing:
+                    st.caption(f"First token: {timing['first_token']:.2f}s • Total: {total_time:.2f}s")
                 
-                # Add assistant response to chat history
+                # Only add the reply to chat history once the stream has finished
                 st.session_state.messages.append({"role": "assistant", "content": ai_response})
             except Exception as e:
                 error_message = f"Error: {str(e)}"
                 st.error(error_message)
                 st.session_state.messages.append({"role": "assistant", "content": error_message})
+        else:
+            with st.spinner("Thinking..."):
+                try:
+                    response = client.chat.completions.create(
+                        model=model,
+                        messages=api_messages,
+                        stream=False
+                    )
+                    ai_response = response.choices[0].message.content
+                    st.markdown(ai_response)
+                    
+                    # Add assistant response to chat history
+                    st.session_state.messages.append({"role": "assistant", "content": ai_response})
+                except Exception as e:
+                    error_message = f"Error: {str(e)}"
+                    st.error(error_message)
+                    st.session_state.messages.append({"role": "assistant", "content": error_message})
 
+# Context usage (shown after the turn so it includes the latest request)
+if st.session_state.context_stats:
+    last_stats = st.session_state.context_stats[-1]
+    with st.sidebar:
+        st.divider()
+        st.subheader("📏 Context")
+        st.metric(
+            "Prompt tokens (last turn)",
+            f"{last_stats['prompt_tokens']:,}",
+            delta=f"{last_stats['prompt_tokens'] - last_stats['full_tokens']:,} vs full history",
+            delta_color="inverse"
+        )
+        st.caption(f"Budget: {last_stats['budget']:,} tokens • Sent {last_stats['sent_messages']} messages • {last_stats['summarized_messages']} summarized")
+        total_sent = sum(s["prompt_tokens"] for s in st.session_state.context_stats)
+        total_full = sum(s["full_tokens"] for s in st.session_state.context_stats)
+        st.caption(f"Whole chat: {total_sent:,} prompt tokens sent ({total_full - total_sent:,} saved)")
@@ -1,14 +1,13 @@
 import streamlit as st
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-import openai
+from llm_client import get_client
+from image_store import get_store, image_source
 
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
-client = openai.OpenAI(
-    api_key=API_KEY,
-    base_url="https://api.poe.com/v1",
-)
+client = get_client(API_KEY)
 
 # Sample pet images (using placeholder images)
 PET_IMAGES = {
@@ -24,6 +23,66 @@ PET_IMAGES = {
     "Ferret": "https://via.placeholder.com/400x300?text=Ferret",
 }
 
+PET_PREFIXES = ('Pet 1:', 'Pet 2:', 'Pet 3:')
+
+class PetStreamParser:
+    """
+    Reads the suggestion text piece by piece while it is being streamed.
+    feed() returns the pets whose 'Pet N:' line has just been completed, so
+    work for that pet can start before the rest of the answer arrives.
+    Lines after a 'Pet N:' line are added to that pet's reason.
+    """
+    def __init__(self):
+        self.pets = []
+        self.text = ""
+        self._buffer = ""
+
+    def feed(self, chunk):
+        self.text += chunk
+        self._buffer += chunk
+        new_pets = []
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            pet = self._parse_line(line)
+            if pet:
+                new_pets.append(pet)
+        return new_pets
+
+    def finish(self):
+        """Parse whatever is left after the stream ends (the last line has no newline)."""
+        line, self._buffer = self._buffer, ""
+        pet = self._parse_line(line)
+        return [pet] if pet else []
+
+    def _parse_line(self, line):
+        line = line.strip()
+        if line.startswith(PET_PREFIXES):
+            parts = line.split(' - ', 1)
+            name = parts[0]
+            for prefix in PET_PREFIXES:
+                name = name.replace(prefix, '')
+            pet = {'name': name.strip(), 'reason': parts[1] if len(parts) == 2 else ""}
+            self.pets.append(pet)
+            return pet
+        if self.pets and line:
+            self.pets[-1]['reason'] = (self.pets[-1]['reason'] + " " + line).strip()
+        return None
+
+def generate_pet_image(pet_name):
+    """Runs in a worker thread - only talks to the API, never to st.*"""
+    response = client.chat.completions.create(
+       model="gpt-image-1",
+       messages=[{"role": "user", "content": "Create a picture of a " + pet_name}],
+       extra_body={
+           "aspect": "3:2",    # Options: "1:1", "3:2", "2:3", "auto"
+           "quality": "high"   # Options: "low", "medium", "high"
+          },
+          stream=False)
+    image_url = response.choices[0].message.content
+    # Start saving the image locally straight away
+    get_store().prefetch(image_url)
+    return image_url
+
 def main():
     st.set_page_config(page_title="Pet Matchmaker", page_icon="🐾")
     
@@ -37,76 +96,76 @@ def main():
         if personality.strip():
             with st.spinner("Analyzing your personality and finding perfect pet matches..."):
                 try:
-                    response = client.chat.completions.create(
+                    stream = client.chat.completions.create(
                         model="gpt-3.5-turbo",
                         messages=[
                             {"role": "system", "content": "You are a pet matching expert. Based on the user's personality description, suggest exactly 3 pet options that would best suit them. Format your response as:\n\nPet 1: [Pet Name] - [2-3 sentence explanation]\n\nPet 2: [Pet Name] - [2-3 sentence explanation]\n\nPet 3: [Pet Name] - [2-3 sentence explanation]\n\nBe specific about the pet type (e.g., Golden Retriever dog, Siamese cat) and explain why it matches their personality."},
                             {"role": "user", "content": f"Based on this personality: {personality}, suggest 3 perfect pets."}
-                        ]
+                        ],
+                        stream=True
                     )
                     
-                    ai_response = response.choices[0].message.content
-                    
-                    # Parse the response
-                    pets = []
-                    lines = ai_response.split('\n')
-                    current_pet = None
-                    current_reason = ""
+                    # Everything for the matches goes in here, so it can be cleared if parsing fails
+                    status_area = st.empty()
+                    results_area = st.empty()
+                    results = results_area.container()
+                    parser = PetStreamParser()
+                    rows = []          # (pet, image slot, reason slot)
+                    futures = {}       # image future -> (pet, image slot)
                     
-                    for line in lines:
-                        line = line.strip()
-                        if line.startswith('Pet 1:') or line.startswith('Pet 2:') or line.startswith('Pet 3:'):
-                            if current_pet:
-                                pets.append({'name': current_pet, 'reason': current_reason.strip()})
-                            parts = line.split(' - ', 1)
-                            if len(parts) == 2:
-                                current_pet = parts[0].replace('Pet 1:', '').replace('Pet 2:', '').replace('Pet 3:', '').strip()
-                                current_reason = parts[1]
-                            else:
-                                current_pet = line.replace('Pet 1:', '').replace('Pet 2:', '').replace('Pet 3:', '').strip()
-                                current_reason = ""
-                        elif current_pet and line:
-                            current_reason += " " + line
-                    
-                    if current_pet:
-                        pets.append({'name': current_pet, 'reason': current_reason.strip()})
+                    def add_pet(executor, pet):
+                        # Start the image as soon as the pet's line is known
+                        if len(rows) >= 3:
+                            return
+                        with results:
+                            col1, col2 = st.columns([1, 2])
+                            image_slot = col1.empty()
+                            image_slot.write("Generating image...")
+                            col2.subheader(f"Pet {len(rows) + 1}: {pet['name']}")
+                            reason_slot = col2.empty()
+                        rows.append((pet, image_slot, reason_slot))
+                        futures[executor.submit(generate_pet_image, pet['name'])] = (pet, image_slot)
                     
-                    if len(pets) < 3:
-                        # Fallback: show raw response
-                        st.warning("Could not parse pet suggestions properly. Here's the AI response:")
-                        st.write(ai_response)
-                        return
+                    def show_image(future):
+                        pet, image_slot = futures.pop(future)
+                        try:
+                            image_slot.image(image_source(future.result()), caption=pet['name'])
+                        except Exception as e:
+                            image_slot.error(f"Image error: {e}")
                     
-                    if len(pets) >= 3:
-                        st.success("Here are your top 3 pet matches!")
+                    executor = ThreadPoolExecutor(max_workers=3)
+                    try:
+                        try:
+                            for chunk in stream:
+                                if not chunk.choices or not chunk.choices[0].delta.content:
+                                    continue
+                                for pet in parser.feed(chunk.choices[0].delta.content):
+                                    add_pet(executor, pet)
+                                # Keep reasons up to date and show any images that are already done
+                                for pet, _, reason_slot in rows:
+                                    reason_slot.write(pet['reason'])
+                                for future in [f for f in futures if f.done()]:
+                                    show_image(future)
+                        finally:
+                            stream.close()
+                        for pet in parser.finish():
+                            add_pet(executor, pet)
                         
-                        for i, pet in enumerate(pets[:3], 1):
-                            pet_name = pet.get('name', 'Unknown Pet')
-                            reason = pet.get('reason', 'No reason provided')
-                            
-                            col1, col2 = st.columns([1, 2])
-                            
-                            with col1:
-                                # Show pet image
-                                st.write("Generating image...")
-                                response = client.chat.completions.create(
-                                   model="gpt-image-1",
-                                   messages=[{"role": "user", "content": "Create a picture of a " + pet_name}],
-                                   extra_body={
-                                       "aspect": "3:2",    # Options: "1:1", "3:2", "2:3", "auto"
-                                       "quality": "high"   # Options: "low", "medium", "high"
-                                      },
-                                      stream=False)
-                                image_url = response.choices[0].message.content
-                                st.image(image_url, caption=pet_name)
-                            with col2:
-                                st.subheader(f"Pet {i}: {pet_name}")
-                                st.write(reason)    
-
-
-
-                    else:
-                        st.error("Could not get 3 pet suggestions. Please try again.")
+                        if len(parser.pets) < 3:
+                            # Fallback: show raw response (the finally below drops the images)
+                            results_area.empty()
+                            st.warning("Could not parse pet suggestions properly. Here's the AI response:")
+                            st.write(parser.text)
+                            return
+                        
+                        status_area.success("Here are your top 3 pet matches!")
+                        for pet, _, reason_slot in rows:
+                            reason_slot.write(pet['reason'] or 'No reason provided')
+                        for future in as_completed(list(futures)):
+                            show_image(future)
+                    finally:
+                        # Don't wait for images nobody will see (the fallback, or an error)
+                        executor.shutdown(wait=False, cancel_futures=True)
                         
                 except Exception as e:
                     st.error(f"Error finding pets: {str(e)}")
@@ -0,0 +1,127 @@
+"""
+Keeps the chat history sent to the model within a token budget.
+
+Sending the whole conversation on every turn makes each request bigger than
+the last, and long chats eventually hit the model's context limit. Instead:
+
+- the system prompt is always sent,
+- the most recent messages are sent as long as they fit in the budget,
+- older messages are folded into a short rolling summary.
+
+The summary is only updated when messages drop out of the window, and only
+the newly dropped messages are summarised (together with the old summary),
+so it is not regenerated on every turn. When folding is needed we trim down
+to FOLD_TARGET of the budget, which leaves room for the next few turns
+before another summary call is needed.
+
+Token counts are a local estimate (no tokenizer download needed).
+"""
+
+# Prompt token budget per model (kept well below each model's context limit)
+MODEL_BUDGETS = {
+    "gemini-2.5-pro": 24000,
+    "gpt-4": 6000,
+    "claude-3-opus": 24000,
+    "llama-3.1-405b": 12000,
+}
+DEFAULT_BUDGET = 6000
+
+SUMMARY_RESERVE = 400      # tokens kept free for the rolling summary
+FOLD_TARGET = 0.7          # fraction of the budget to trim down to when folding
+MESSAGE_OVERHEAD = 4       # per-message role/format tokens
+
+
+def estimate_tokens(text):
+    """Rough token count: ~4 characters per token for Latin text, 1 per CJK character."""
+    if not text:
+        return 0
+    cjk = sum(
+        1 for ch in text
+        if "\u2e80" <= ch <= "\u9fff" or "\uac00" <= ch <= "\ud7af" or "\uff00" <= ch <= "\uffef"
+    )
+    other = len(text) - cjk
+    return cjk + (other + 3) // 4
+
+
+def message_tokens(message):
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+def get_budget(model):
+    return MODEL_BUDGETS.get(model, DEFAULT_BUDGET)
+
+
+def new_summary():
+    """Empty summary state: the summary text and how many messages it covers."""
+    return {"text": "", "upto": 0}
+
+
+def _window_start(messages, lowest_start, available):
+    """Index of the oldest message that still fits, newest messages first.
+
+    The latest message is always kept, even if it is bigger than the budget.
+    """
+    used = 0
+    start = len(messages)
+    while start > lowest_start:
+        cost = message_tokens(messages[start - 1])
+        if used + cost > available and start < len(messages):
+            break
+        used += cost
+        start -= 1
+    return start
+
+
+def build_api_messages(system_prompt, messages, model, summary, summarize):
+    """Build the message list for the API call.
+
+    summarize(previous_summary_text, new_messages) -> updated summary text
+    is only called when older messages need to leave the window.
+
+    Returns (api_messages, summary, stats). Store the returned summary for
+    the next turn. stats has the estimated prompt tokens actually sent and
+    the tokens the full history would have cost.
+    """
+    budget = get_budget(model)
+
+    # History was cleared or shortened - start the summary again
+    if summary["upto"] > len(messages):
+        summary = new_summary()
+
+    system_messages = []
+    if system_prompt and system_prompt.strip():
+        system_messages.append({"role": "system", "content": system_prompt.strip()})
+    fixed_tokens = sum(message_tokens(m) for m in system_messages)
+    available = budget - fixed_tokens - SUMMARY_RESERVE
+
+    start = _window_start(messages, summary["upto"], available)
+    first = summary["upto"]  # first message sent in full
+    if start > summary["upto"]:
+        # Some messages no longer fit: fold a whole chunk into the summary at once
+        start = max(start, _window_start(messages, summary["upto"], int(available * FOLD_TARGET)))
+        dropped = messages[summary["upto"]:start]
+        first = start
+        try:
+            summary = {"text": summarize(summary["text"], dropped), "upto": start}
+        except Exception:
+            # Keep the chat working even if the summary call fails: this turn
+            # leaves the dropped messages out, but the summary still ends where
+            # it did, so they are summarised again on the next turn
+            pass
+
+    api_messages = list(system_messages)
+    if summary["text"]:
+        api_messages.append({
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{summary['text']}",
+        })
+    api_messages.extend({"role": m["role"], "content": m["content"]} for m in messages[first:])
+
+    stats = {
+        "prompt_tokens": sum(message_tokens(m) for m in api_messages),
+        "full_tokens": fixed_tokens + sum(message_tokens(m) for m in messages),
+        "budget": budget,
+        "sent_messages": len(messages) - first,
+        "summarized_messages": summary["upto"],
+    }
+    return api_messages, summary, stats
@@ -0,0 +1,180 @@
+"""
+On-disk cache for chat completions.
+
+Many prompts in these apps are sent again and again (the same luck test
+idea, the same personality text...). This module stores finished
+completions in a small SQLite file, keyed by a hash of the request
+(model, messages, extra_body and any other options), so a repeated
+request is answered from disk with no network call and no token spend.
+
+Entries expire after a time-to-live, and the least recently used ones are
+removed once the cache holds more than max_entries rows.
+
+Usage:
+    from completion_cache import cached_client
+    client = cached_client(get_client(API_KEY))
+    client.chat.completions.create(model=..., messages=...)              # cached
+    client.chat.completions.create(model=..., messages=..., cache=False)  # always fresh
+
+Image models reply with a URL that expires within hours, so their calls
+should pass cache=False: a cached reply would point at a dead image.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+
+CACHE_FILE = os.getenv("LLM_CACHE_FILE", ".llm_cache.sqlite3")
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+
+def make_key(request):
+    """Build a stable hash for a create() call from its keyword arguments."""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """SQLite-backed completion store with TTL and LRU eviction."""
+
+    def __init__(self, path=CACHE_FILE, max_entries=MAX_ENTRIES, ttl_seconds=TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions(last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Return the cached ChatCompletion for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return ChatCompletion.model_validate_json(row[0])
+
+    def put(self, key, response):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, response.model_dump_json(), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM completions WHERE key IN "
+                "(SELECT key FROM completions ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+    def summary(self):
+        """One line for the page, e.g. 'Reply cache: 3 hits, 5 misses (38% hit rate)'."""
+        stats = self.stats()
+        return f"Reply cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)"
+
+
+class _CachedCompletions:
+    def __init__(self, completions, cache):
+        self._completions = completions
+        self._cache = cache
+
+    def create(self, *, cache=True, **kwargs):
+        # Streams are consumed piece by piece, so they always go to the API
+        if not cache or kwargs.get("stream"):
+            return self._completions.create(**kwargs)
+
+        key = make_key(kwargs)
+        response = self._cache.get(key)
+        if response is not None:
+            return response
+
+        response = self._completions.create(**kwargs)
+        self._cache.put(key, response)
+        return response
+
+
+class CachedClient:
+    """Wraps an OpenAI client so chat.completions.create() goes through the cache.
+
+    Everything else (images, models, ...) is passed straight to the real client.
+    """
+
+    def __init__(self, client, cache):
+        self._client = client
+        self.cache = cache
+        self.chat = SimpleNamespace(completions=_CachedCompletions(client.chat.completions, cache))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path=CACHE_FILE):
+    """Return the process-wide cache for this file, opening it once."""
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = CompletionCache(path)
+            _caches[path] = cache
+        return cache
+
+
+def cached_client(client, cache=None):
+    """Return client wrapped with the shared completion cache."""
+    return CachedClient(client, cache or get_cache())
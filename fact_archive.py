@@ -0,0 +1,114 @@
+"""
+Durable archive of every generated fact, with full-text search.
+
+Facts are stored in a SQLite table and indexed with FTS5 so they can be
+searched in English and Traditional Chinese. FTS5's default tokenizer treats
+a whole run of Chinese characters as one word, so the Chinese text is
+indexed one character per token and Chinese search terms become phrase
+queries ("蜂蜜" -> "蜂 蜜"), which match those characters next to each other.
+
+Results come back newest first, one page at a time, straight from the
+index - nothing is loaded into memory up front, so searches stay fast
+however big the archive gets.
+"""
+
+import re
+import sqlite3
+import threading
+
+ARCHIVE_FILE = ".fact_archive.sqlite3"
+
+_CJK = re.compile(r"[\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+
+def cjk_tokens(text):
+    """Put spaces around every CJK character so each one is indexed as its own token."""
+    return _CJK.sub(lambda m: f" {m.group(0)} ", text or "")
+
+
+def build_match_query(query):
+    """Turn what the user typed into an FTS5 MATCH expression (all terms must match)."""
+    terms = []
+    for term in query.split():
+        term = term.replace('"', "")
+        if not term:
+            continue
+        if _CJK.search(term):
+            # Chinese: the characters must appear together, in this order
+            terms.append('"' + " ".join(cjk_tokens(term).split()) + '"')
+        else:
+            # English: prefix match, so "octo" finds "octopus"
+            terms.append(f'"{term}"*')
+    return " ".join(terms)
+
+
+class FactArchive:
+    """SQLite store for facts with an FTS5 index over both languages."""
+
+    def __init__(self, path=ARCHIVE_FILE):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS facts (
+                id INTEGER PRIMARY KEY,
+                text_en TEXT NOT NULL,
+                text_zh_tw TEXT NOT NULL,
+                category TEXT NOT NULL,
+                model TEXT NOT NULL,
+                timestamp TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_category ON facts(category, id)")
+        # Contentless index: the text itself lives in the facts table
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(text_en, text_zh, content='')"
+        )
+        self._conn.commit()
+
+    def add(self, fact, model):
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO facts (text_en, text_zh_tw, category, model, timestamp) VALUES (?, ?, ?, ?, ?)",
+                (fact["text_en"], fact["text_zh_tw"], fact["category"], model, fact["timestamp"]),
+            )
+            self._conn.execute(
+                "INSERT INTO facts_fts (rowid, text_en, text_zh) VALUES (?, ?, ?)",
+                (cursor.lastrowid, fact["text_en"], cjk_tokens(fact["text_zh_tw"])),
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def search(self, query="", categories=(), page=0, page_size=10):
+        """Return (facts, has_more) for one page of results, newest first.
+
+        query is matched against both languages; categories (if any) limits
+        the results to those categories.
+        """
+        match = build_match_query(query)
+        params = []
+        if match:
+            sql = "SELECT f.* FROM facts_fts JOIN facts f ON f.id = facts_fts.rowid WHERE facts_fts MATCH ?"
+            order = "facts_fts.rowid"
+            params.append(match)
+        else:
+            sql = "SELECT f.* FROM facts f WHERE 1"
+            order = "f.id"
+        if categories:
+            sql += f" AND f.category IN ({','.join('?' * len(categories))})"
+            params.extend(categories)
+        # Fetch one extra row to know whether there is a next page (no COUNT over the archive)
+        sql += f" ORDER BY {order} DESC LIMIT ? OFFSET ?"
+        params.extend([page_size + 1, page * page_size])
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        facts = [dict(row) for row in rows[:page_size]]
+        return facts, len(rows) > page_size
+
+    def __len__(self):
+        # Facts are never deleted, so the highest id is the count (and needs no table scan)
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) FROM facts").fetchone()
+        return row[0] or 0
@@ -0,0 +1,183 @@
+"""
+Near-duplicate detection for generated facts.
+
+The models like to repeat the same few "fascinating facts" (honey never
+spoils, octopuses have three hearts...) in slightly different words. This
+index remembers every fact's English text as a MinHash signature and uses
+locality-sensitive hashing (LSH) to find facts that share most of their
+words with a new one, without comparing against every stored fact.
+
+- Shingles: the fact's content words (single words match paraphrases
+  better than word pairs, which change when a sentence is reordered).
+- MinHash: NUM_PERM hash values per fact; the share of equal values
+  estimates how similar two facts' shingle sets are (Jaccard similarity).
+- LSH: the signature is cut into BANDS bands of ROWS values; facts that
+  match on a whole band land in the same bucket and become candidates.
+  With 4 rows per band, facts that share only a few words rarely share a
+  bucket, which keeps the candidates few.
+- Each candidate is then confirmed with the exact Jaccard similarity of
+  the stored shingles, so the MinHash estimate never reports a false
+  duplicate.
+
+Shingles and buckets are stored in SQLite, so the index survives restarts
+and a lookup is one indexed query (see fact_dedup_benchmark.py).
+"""
+
+import random
+import re
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+
+INDEX_FILE = ".fact_index.sqlite3"
+
+NUM_PERM = 128
+ROWS = 4
+BANDS = NUM_PERM // ROWS
+THRESHOLD = 0.5  # Jaccard similarity at which a fact counts as a duplicate
+INDEX_VERSION = 2  # bump when shingles, hashes or bands change, to rebuild stored indexes
+
+# Hashes are reduced below 2**31, so a * h + b fits in 64 bits and all NUM_PERM
+# values are computed in one NumPy operation
+_PRIME = (1 << 31) - 1
+_rng = random.Random(20240601)  # fixed seed: signatures must match across runs
+_A = np.array([_rng.randrange(1, _PRIME) for _ in range(NUM_PERM)], dtype=np.uint64)[:, None]
+_B = np.array([_rng.randrange(0, _PRIME) for _ in range(NUM_PERM)], dtype=np.uint64)[:, None]
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "at", "to", "for", "by", "with",
+    "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "these", "those",
+    "as", "from", "can", "could", "has", "have", "had", "do", "does", "did", "than", "then", "because",
+    "their", "they", "there", "which", "who", "what", "when", "while", "about", "into", "up",
+    "more", "most", "some", "any", "all", "only", "also", "even", "very", "just", "over",
+    "fact", "you", "know", "actually", "called",
+}
+
+
+def shingles(text):
+    """Content words of a fact, lower-cased, without common filler words."""
+    words = [w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in STOPWORDS]
+    return {singular(w) for w in words}
+
+
+def singular(word):
+    """Crude singular form so "hearts"/"heart" and "octopuses"/"octopus" match."""
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("es") and word[:-2].endswith(("s", "x", "z", "ch", "sh")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def signature(words):
+    """MinHash signature (array of NUM_PERM integers) of a set of shingles."""
+    if not words:
+        return None
+    hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in words], dtype=np.uint64) % _PRIME
+    return ((_A * hashes + _B) % _PRIME).min(axis=1)
+
+
+def band_buckets(sig):
+    """One bucket id per band (the band number is mixed in so bands never collide)."""
+    return [band << 32 | zlib.crc32(part.tobytes(), band) for band, part in enumerate(sig.reshape(BANDS, ROWS))]
+
+
+def jaccard(words_a, words_b):
+    """Exact Jaccard similarity of two shingle sets."""
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+class NearDuplicateIndex:
+    """Persistent MinHash/LSH index over fact texts."""
+
+    def __init__(self, path=INDEX_FILE, threshold=THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._upgrade()
+
+    def _upgrade(self):
+        """Create the tables, or rebuild them from the stored texts if they use an older layout."""
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] == INDEX_VERSION:
+            return
+        texts = []
+        if self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'facts'").fetchone():
+            texts = [row[0] for row in self._conn.execute("SELECT text_en FROM facts ORDER BY id")]
+        with self._conn:
+            self._conn.execute("DROP TABLE IF EXISTS buckets")
+            self._conn.execute("DROP TABLE IF EXISTS facts")
+            self._conn.execute(
+                "CREATE TABLE facts (id INTEGER PRIMARY KEY, text_en TEXT NOT NULL, shingles TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE buckets (bucket INTEGER NOT NULL, fact_id INTEGER NOT NULL, "
+                "PRIMARY KEY (bucket, fact_id)) WITHOUT ROWID"
+            )
+            self._insert(texts)
+            self._conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+
+    def find_duplicate(self, text):
+        """Return the stored text most similar to text if it is a near duplicate, else None."""
+        words = shingles(text)
+        if not words:
+            return None
+        buckets = band_buckets(signature(words))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT text_en, shingles FROM facts WHERE id IN "
+                f"(SELECT fact_id FROM buckets WHERE bucket IN ({','.join('?' * len(buckets))}))",
+                buckets,
+            ).fetchall()
+        best_text, best_score = None, 0.0
+        for stored_text, stored_words in rows:
+            score = jaccard(words, set(stored_words.split()))
+            if score > best_score:
+                best_text, best_score = stored_text, score
+        return best_text if best_score >= self.threshold else None
+
+    def is_duplicate(self, text):
+        return self.find_duplicate(text) is not None
+
+    def add(self, text):
+        self.add_many([text])
+
+    def add_many(self, texts):
+        """Add several facts in one transaction."""
+        with self._lock, self._conn:
+            self._insert(texts)
+
+    def _insert(self, texts):
+        for text in texts:
+            words = shingles(text)
+            if not words:
+                continue
+            cursor = self._conn.execute(
+                "INSERT INTO facts (text_en, shingles) VALUES (?, ?)", (text, " ".join(sorted(words)))
+            )
+            self._conn.executemany(
+                "INSERT INTO buckets (bucket, fact_id) VALUES (?, ?)",
+                [(bucket, cursor.lastrowid) for bucket in band_buckets(signature(words))],
+            )
+
+    def recent(self, limit=10):
+        """The most recently added fact texts, newest first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT text_en FROM facts ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [row[0] for row in rows]
+
+
+def topic_hint(text, words=8):
+    """Shorten a fact to its first few words, for 'avoid these topics' prompts."""
+    parts = text.split()
+    return " ".join(parts[:words]) + ("..." if len(parts) > words else "")
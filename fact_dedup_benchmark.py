@@ -0,0 +1,102 @@
+"""
+================================================================================
+FACT NEAR-DUPLICATE INDEX BENCHMARK
+================================================================================
+Fills a near-duplicate index (fact_dedup.py) with 100,000 made-up facts and
+times find_duplicate() for:
+
+- new facts, which should not be reported as duplicates
+- reworded copies of stored facts (one word swapped, one dropped), which
+  should be
+
+The facts are 8-14 words drawn with a Zipf distribution, in two mixes:
+
+- typical: like the content words of real facts. The ~100 most common
+  words of English are filler words that STOPWORDS removes, so the
+  vocabulary starts at rank 101.
+- skewed: a stress test where a handful of words turn up in most facts,
+  which fills the LSH buckets with candidates that share only those
+  words. Some new facts really are near duplicates here by chance.
+
+"below threshold" counts duplicates reported for a fact whose exact
+Jaccard similarity is under THRESHOLD (false duplicates); it should be 0.
+
+The index is saved in a temporary folder and deleted afterwards.
+
+Run it with:
+    python fact_dedup_benchmark.py
+================================================================================
+"""
+
+import itertools
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from fact_dedup import THRESHOLD, NearDuplicateIndex, jaccard, shingles
+
+FACTS = 100_000
+LOOKUPS = 500
+VOCABULARY = [f"word{i}x" for i in range(50_000)]  # the "x" keeps singular() from changing them
+MIXES = {  # name: (rank of the first word, Zipf exponent)
+    "typical": (101, 1.0),
+    "skewed": (1, 1.1),
+}
+
+rng = random.Random(42)
+
+
+def zipf_weights(first_rank, exponent):
+    ranks = range(first_rank, first_rank + len(VOCABULARY))
+    return list(itertools.accumulate(1 / rank ** exponent for rank in ranks))
+
+
+def make_fact(weights):
+    return " ".join(rng.choices(VOCABULARY, cum_weights=weights, k=rng.randint(8, 14)))
+
+
+def reword(fact):
+    words = fact.split()
+    words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+    del words[rng.randrange(len(words))]
+    return " ".join(words)
+
+
+def time_lookups(index, texts):
+    """(lookup times in ms, texts reported as duplicates, of which below THRESHOLD)."""
+    timings, found, wrong = [], 0, 0
+    for text in texts:
+        start = time.perf_counter()
+        duplicate = index.find_duplicate(text)
+        timings.append((time.perf_counter() - start) * 1000)
+        if duplicate is not None:
+            found += 1
+            if jaccard(shingles(text), shingles(duplicate)) < THRESHOLD:
+                wrong += 1
+    return timings, found, wrong
+
+
+def run_mix(weights, path):
+    index = NearDuplicateIndex(path)
+    stored = [make_fact(weights) for _ in range(FACTS)]
+    index.add_many(stored)
+    return {
+        "new facts": time_lookups(index, [make_fact(weights) for _ in range(LOOKUPS)]),
+        "reworded copies": time_lookups(index, [reword(fact) for fact in rng.sample(stored, LOOKUPS)]),
+    }
+
+
+if __name__ == "__main__":
+    benchmark_dir = tempfile.mkdtemp(prefix="fact-dedup-benchmark-")
+    print(f"{FACTS:,} facts stored, {LOOKUPS} lookups each\n")
+    print(f"{'Mix':<8} | {'Lookup':<16} | {'median ms':>10} | {'p99 ms':>8} | {'duplicates':>10} | {'below threshold':>15}")
+    print("-" * 82)
+    for mix, (first_rank, exponent) in MIXES.items():
+        results = run_mix(zipf_weights(first_rank, exponent), os.path.join(benchmark_dir, f"{mix}.sqlite3"))
+        for name, (timings, found, wrong) in results.items():
+            p99 = statistics.quantiles(timings, n=100)[98]
+            print(f"{mix:<8} | {name:<16} | {statistics.median(timings):>10.2f} | {p99:>8.2f} | {found:>10,} | {wrong:>15,}")
+    shutil.rmtree(benchmark_dir, ignore_errors=True)
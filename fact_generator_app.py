@@ -1,17 +1,112 @@
 import os
 import streamlit as st
-import openai
+from llm_client import get_client
+from fact_prefetch import FactPool, SYSTEM_PROMPT, single_fact_prompt, parse_fact
+from fact_dedup import NearDuplicateIndex, topic_hint
+from fact_archive import FactArchive
 from dotenv import load_dotenv
 from datetime import datetime
 
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
 
-# Initialize OpenAI client
-client = openai.OpenAI(
-    api_key=API_KEY,
-    base_url="https://api.poe.com/v1",
-)
+# Shared, pooled OpenAI client (reused across reruns)
+client = get_client(API_KEY)
+
+CATEGORIES = [
+    "Random",
+    "Science",
+    "History",
+    "Nature",
+    "Technology",
+    "Space",
+    "Animals",
+    "Geography",
+    "Culture",
+    "Food"
+]
+
+# How many times to ask again when the model repeats a fact we already have
+MAX_DUPLICATE_RETRIES = 3
+RECENT_TOPICS = 10
+
+
+@st.cache_resource
+def get_fact_index():
+    """Near-duplicate index of every fact generated so far (kept on disk)."""
+    return NearDuplicateIndex()
+
+
+fact_index = get_fact_index()
+
+
+def recent_topics():
+    return [topic_hint(text) for text in fact_index.recent(RECENT_TOPICS)]
+
+
+@st.cache_resource
+def get_fact_pool():
+    """One prefetch pool per server process, shared by every rerun and session."""
+    return FactPool(client, avoid_topics=recent_topics)
+
+
+fact_pool = get_fact_pool()
+
+
+@st.cache_resource
+def get_fact_archive():
+    """Searchable archive of every fact ever generated (kept on disk)."""
+    return FactArchive()
+
+
+fact_archive = get_fact_archive()
+
+
+def request_single_fact(category, model):
+    """Ask the model for one fact right now (used when the prefetch buffer is empty)."""
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": single_fact_prompt(category, recent_topics())}
+        ],
+        stream=False
+    )
+    
+    # Parse English and Traditional Chinese from response
+    return parse_fact(response.choices[0].message.content.strip())
+
+def fact_card_html(number, fact):
+    """Build the HTML card for one fact (cached per fact, see get_card_html)."""
+    # Handle both old format (text) and new format (text_en, text_zh_tw)
+    fact_en = fact.get('text_en', fact.get('text', ''))
+    fact_zh_tw = fact.get('text_zh_tw', '')
+    
+    # Create card using markdown with custom styling
+    if fact_zh_tw:
+        return f"""
+            <div class="fact-card">
+                <h3>💡 {fact['category']} Fact #{number}</h3>
+                <div class="fact-content">
+                    <strong>🇬🇧 English:</strong><br>{fact_en}<br><br>
+                    <strong>🇹🇼 繁體中文:</strong><br>{fact_zh_tw}
+                </div>
+                <div class="fact-timestamp">🕒 {fact['timestamp']}</div>
+            </div>
+            """
+    # Fallback for old format facts
+    return f"""
+            <div class="fact-card">
+                <h3>💡 {fact['category']} Fact #{number}</h3>
+                <div class="fact-content">{fact_en}</div>
+                <div class="fact-timestamp">🕒 {fact['timestamp']}</div>
+            </div>
+            """
+
+
+def reset_archive_page():
+    st.session_state.archive_page = 0
+
 
 # Page configuration
 st.set_page_config(
@@ -66,6 +161,16 @@ st.markdown("""
 if "facts" not in st.session_state:
     st.session_state.facts = []
 
+# Rendered card HTML per fact index, and the collection page being viewed
+if "card_cache" not in st.session_state:
+    st.session_state.card_cache = {}
+if "fact_page" not in st.session_state:
+    st.session_state.fact_page = 0
+if "duplicates_skipped" not in st.session_state:
+    st.session_state.duplicates_skipped = 0
+if "archive_page" not in st.session_state:
+    st.session_state.archive_page = 0
+
 # Header
 st.title("💡 AI-Powered Random Fact Generator")
 st.markdown("Generate interesting random facts and collect them in beautiful cards!")
@@ -77,18 +182,7 @@ with st.sidebar:
     # Category selection
     category = st.selectbox(
         "Choose a category:",
-        [
-            "Random",
-            "Science",
-            "History",
-            "Nature",
-            "Technology",
-            "Space",
-            "Animals",
-            "Geography",
-            "Culture",
-            "Food"
-        ],
+        CATEGORIES,
         index=0
     )
     
@@ -103,11 +197,48 @@ with st.sidebar:
     st.divider()
     if st.button("🗑️ Clear All Facts", use_container_width=True):
         st.session_state.facts = []
+        st.session_state.card_cache = {}
+        st.session_state.fact_page = 0
         st.rerun()
     
     # Stats
     st.divider()
     st.metric("Total Facts", len(st.session_state.facts))
+    
+    st.divider()
+    st.markdown("### ⚡ Prefetch Buffer")
+    st.metric(
+        "Ready Facts",
+        fact_pool.depth(category, model),
+        help="Facts already generated in the background for this category and model"
+    )
+    pool_stats = fact_pool.stats
+    st.caption(
+        f"{'🔄 Refilling… ' if fact_pool.is_refilling(category, model) else ''}"
+        f"Batches: {pool_stats['batches']} • Prefetched: {pool_stats['prefetched']} • "
+        f"Instant: {pool_stats['served']} • Waited: {pool_stats['misses']}"
+    )
+    st.caption(
+        f"🔁 Repeats skipped: {st.session_state.duplicates_skipped} • "
+        f"Facts remembered: {len(fact_index)}"
+    )
+    if pool_stats["errors"]:
+        st.caption(f"⚠️ Refill errors: {pool_stats['errors']} (last: {pool_stats['last_error'][:80]})")
+    
+    # Search every fact ever generated, not just this session's
+    st.divider()
+    st.markdown("### 🗄️ Fact Archive")
+    archive_query = st.text_input(
+        "Search saved facts:",
+        placeholder="e.g. honey, octopus, 蜂蜜...",
+        on_change=reset_archive_page
+    )
+    archive_categories = st.multiselect(
+        "Filter by category:",
+        CATEGORIES,
+        on_change=reset_archive_page
+    )
+    st.caption(f"{len(fact_archive):,} facts saved in the archive")
 
 # Main content area
 col1, col2 = st.columns([3, 1])
@@ -115,98 +246,135 @@ col1, col2 = st.columns([3, 1])
 with col1:
     # Generate fact button
     if st.button("✨ Generate New Fact", use_container_width=True, type="primary"):
+        fact = None
         with st.spinner("Generating an interesting fact..."):
             try:
-                # Create prompt based on category
-                if category == "Random":
-                    prompt = "Generate a fascinating, true, and interesting random fact. Make it concise (1-2 sentences) and engaging. Provide the fact in BOTH English and Traditional Chinese. Format your response as:\n\nEnglish: [fact in English]\nTraditional Chinese: [fact in Traditional Chinese]"
-                else:
-                    prompt = f"Generate a fascinating, true, and interesting fact about {category.lower()}. Make it concise (1-2 sentences) and engaging. Provide the fact in BOTH English and Traditional Chinese. Format your response as:\n\nEnglish: [fact in English]\nTraditional Chinese: [fact in Traditional Chinese]"
-                
-                # Get AI response
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a knowledgeable fact generator. Provide interesting, accurate, and engaging facts in both English and Traditional Chinese. Keep responses concise and factual. Always format your response with 'English:' and 'Traditional Chinese:' labels."
-                        },
-                        {"role": "user", "content": prompt}
-                    ],
-                    stream=False
-                )
-                
-                response_text = response.choices[0].message.content.strip()
-                
-                # Parse English and Traditional Chinese from response
-                fact_text_en = ""
-                fact_text_zh_tw = ""
-                
-                if "English:" in response_text and "Traditional Chinese:" in response_text:
-                    parts = response_text.split("Traditional Chinese:")
-                    if len(parts) == 2:
-                        fact_text_en = parts[0].replace("English:", "").strip()
-                        fact_text_zh_tw = parts[1].strip()
-                elif "English:" in response_text:
-                    fact_text_en = response_text.replace("English:", "").strip()
-                elif "Traditional Chinese:" in response_text:
-                    fact_text_zh_tw = response_text.replace("Traditional Chinese:", "").strip()
+                for _ in range(MAX_DUPLICATE_RETRIES + 1):
+                    # Take a ready fact from the prefetch buffer if there is one
+                    candidate = fact_pool.pop(category, model) or request_single_fact(category, model)
+                    
+                    # Skip facts that are just a rewording of one we already have
+                    if candidate["text_en"] and fact_index.is_duplicate(candidate["text_en"]):
+                        st.session_state.duplicates_skipped += 1
+                        continue
+                    fact = candidate
+                    break
                 else:
-                    # Fallback: treat entire response as English
-                    fact_text_en = response_text
-                
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                # Add fact to session state
-                st.session_state.facts.append({
-                    "text_en": fact_text_en,
-                    "text_zh_tw": fact_text_zh_tw,
-                    "category": category,
-                    "timestamp": timestamp
-                })
-                
-                st.success("Fact generated successfully! ✨")
-                st.rerun()
-                
+                    st.warning("The model kept repeating facts you already have - try another category!")
             except Exception as e:
                 st.error(f"Error generating fact: {str(e)}")
+        
+        if fact is not None:
+            if fact["text_en"]:
+                fact_index.add(fact["text_en"])
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            
+            new_fact = {
+                "text_en": fact["text_en"],
+                "text_zh_tw": fact["text_zh_tw"],
+                "category": category,
+                "timestamp": timestamp
+            }
+            
+            # Add fact to session state, and keep it in the archive for later sessions
+            st.session_state.facts.append(new_fact)
+            try:
+                fact_archive.add(new_fact, model)
+            except Exception as e:
+                st.warning(f"Could not save fact to the archive: {str(e)}")
+            
+            # Jump back to the first page so the new fact is visible
+            st.session_state.fact_page = 0
+            
+            st.success("Fact generated successfully! ✨")
+            st.rerun()
 
 with col2:
     st.write("")  # Spacing
 
-# Display facts in cards
+FACTS_PER_PAGE = 10
+
+
+def change_archive_page(step):
+    st.session_state.archive_page += step
+
+
+@st.fragment
+def render_archive_results(query, categories):
+    """Show one page of archive search results (paging re-runs only this fragment)."""
+    page = st.session_state.archive_page
+    results, has_more = fact_archive.search(query, categories, page, FACTS_PER_PAGE)
+    
+    if not results:
+        st.info("No saved facts match your search.")
+        return
+    
+    st.markdown("".join(fact_card_html(fact["id"], fact) for fact in results), unsafe_allow_html=True)
+    
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button("⬅️ Newer", key="archive_newer", disabled=page == 0, on_click=change_archive_page, args=(-1,), use_container_width=True)
+    with col_page:
+        st.markdown(f"<p style='text-align: center;'>Page {page + 1}</p>", unsafe_allow_html=True)
+    with col_next:
+        st.button("Older ➡️", key="archive_older", disabled=not has_more, on_click=change_archive_page, args=(1,), use_container_width=True)
+
+
+# Archive search results
+if archive_query.strip() or archive_categories:
+    st.divider()
+    st.subheader("🔎 Archive Search Results")
+    render_archive_results(archive_query.strip(), archive_categories)
+
+
+def get_card_html(index):
+    """Card HTML for st.session_state.facts[index], built only the first time it is shown."""
+    cards = st.session_state.card_cache
+    if index not in cards:
+        cards[index] = fact_card_html(index + 1, st.session_state.facts[index])
+    return cards[index]
+
+
+def change_fact_page(step):
+    st.session_state.fact_page += step
+
+
+@st.fragment
+def render_fact_collection():
+    """Show one page of facts, newest first.
+
+    Runs as a fragment, so paging only re-runs this function - and each
+    page sends at most FACTS_PER_PAGE cards to the browser however big
+    the collection gets.
+    """
+    total = len(st.session_state.facts)
+    page_count = (total + FACTS_PER_PAGE - 1) // FACTS_PER_PAGE
+    page = min(max(st.session_state.fact_page, 0), page_count - 1)
+    st.session_state.fact_page = page
+    
+    # Newest first: page 0 holds the last FACTS_PER_PAGE facts
+    newest = total - 1 - page * FACTS_PER_PAGE
+    oldest = max(newest - FACTS_PER_PAGE + 1, 0)
+    page_html = "".join(get_card_html(index) for index in range(newest, oldest - 1, -1))
+    st.markdown(page_html, unsafe_allow_html=True)
+    
+    if page_count > 1:
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            st.button("⬅️ Newer", disabled=page == 0, on_click=change_fact_page, args=(-1,), use_container_width=True)
+        with col_page:
+            st.markdown(
+                f"<p style='text-align: center;'>Page {page + 1} of {page_count}</p>",
+                unsafe_allow_html=True
+            )
+        with col_next:
+            st.button("Older ➡️", disabled=page >= page_count - 1, on_click=change_fact_page, args=(1,), use_container_width=True)
+
+
 if st.session_state.facts:
     st.divider()
     st.subheader(f"📚 Your Fact Collection ({len(st.session_state.facts)} facts)")
-    
-    # Display facts in reverse order (newest first)
-    for idx, fact in enumerate(reversed(st.session_state.facts)):
-        # Handle both old format (text) and new format (text_en, text_zh_tw)
-        fact_en = fact.get('text_en', fact.get('text', ''))
-        fact_zh_tw = fact.get('text_zh_tw', '')
-        
-        # Create card using markdown with custom styling
-        if fact_zh_tw:
-            card_html = f"""
-            <div class="fact-card">
-                <h3>💡 {fact['category']} Fact #{len(st.session_state.facts) - idx}</h3>
-                <div class="fact-content">
-                    <strong>🇬🇧 English:</strong><br>{fact_en}<br><br>
-                    <strong>🇹🇼 繁體中文:</strong><br>{fact_zh_tw}
-                </div>
-                <div class="fact-timestamp">🕒 {fact['timestamp']}</div>
-            </div>
-            """
-        else:
-            # Fallback for old format facts
-            card_html = f"""
-            <div class="fact-card">
-                <h3>💡 {fact['category']} Fact #{len(st.session_state.facts) - idx}</h3>
-                <div class="fact-content">{fact_en}</div>
-                <div class="fact-timestamp">🕒 {fact['timestamp']}</div>
-            </div>
-            """
-        st.markdown(card_html, unsafe_allow_html=True)
+    render_fact_collection()
 else:
     st.info("👆 Click the button above to generate your first fact!")
 
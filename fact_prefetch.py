@@ -0,0 +1,172 @@
+"""
+Background prefetching of facts for fact_generator_app.py.
+
+Instead of waiting for one model call per "Generate New Fact" click, a
+background worker asks for a batch of facts in a single call and keeps them
+in a small buffer per (category, model). A click just takes the next ready
+fact. A refill only starts when a fact is taken (so browsing categories
+costs nothing), and a batch that fails or parses to no facts puts that
+buffer on a RETRY_AFTER cooldown instead of being retried at once.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+BATCH_SIZE = 5   # facts requested per API call
+LOW_WATER = 2    # refill when fewer than this many facts are ready
+RETRY_AFTER = 60  # seconds before refilling again after a failed or empty batch
+
+SYSTEM_PROMPT = "You are a knowledgeable fact generator. Provide interesting, accurate, and engaging facts in both English and Traditional Chinese. Keep responses concise and factual. Always format your response with 'English:' and 'Traditional Chinese:' labels."
+
+
+def topic_text(category):
+    return "random fact" if category == "Random" else f"fact about {category.lower()}"
+
+
+def avoid_text(avoid):
+    """Extra instruction that steers the model away from topics it has already covered."""
+    if not avoid:
+        return ""
+    return "\n\nDo NOT use any of these recently covered topics, or a rewording of them:\n" + "\n".join(f"- {topic}" for topic in avoid)
+
+
+def single_fact_prompt(category, avoid=()):
+    return f"Generate a fascinating, true, and interesting {topic_text(category)}. Make it concise (1-2 sentences) and engaging. Provide the fact in BOTH English and Traditional Chinese. Format your response as:\n\nEnglish: [fact in English]\nTraditional Chinese: [fact in Traditional Chinese]" + avoid_text(avoid)
+
+
+def batch_prompt(category, count, avoid=()):
+    return f"Generate {count} different fascinating, true, and interesting facts (each one a {topic_text(category)}), each on a different topic. Make each fact concise (1-2 sentences) and engaging. Provide every fact in BOTH English and Traditional Chinese. Format your response as:\n\nFact 1:\nEnglish: [fact in English]\nTraditional Chinese: [fact in Traditional Chinese]\n\nFact 2:\n..." + avoid_text(avoid)
+
+
+# Markdown the model sometimes wraps the labels in: bold/italic stars and heading hashes
+_MARKUP = re.compile(r"\*+|^[ \t]*#+[ \t]*", re.MULTILINE)
+_FACT_HEADING = re.compile(r"^[ \t]*Fact \d+\b.*$", re.MULTILINE)
+# One English / Traditional Chinese pair; neither part may run into the next "English:"
+_FACT_PAIR = re.compile(
+    r"English\s*:\s*((?:(?!English\s*:).)*?)\s*Traditional Chinese\s*[:：]\s*((?:(?!English\s*:).)*)",
+    re.DOTALL,
+)
+# Numbering, bullets or rules left on their own lines before the next fact ("2.", "-", "---")
+_TRAILING_MARKER = re.compile(r"(?:\n\s*(?:\d+[.)]|[-•]+))+\s*$")
+
+
+def strip_markup(text):
+    return _MARKUP.sub("", text)
+
+
+def parse_fact(response_text):
+    """Split one 'English: ... Traditional Chinese: ...' answer into a fact record."""
+    response_text = strip_markup(response_text)
+    fact_text_en = ""
+    fact_text_zh_tw = ""
+
+    if "English:" in response_text and "Traditional Chinese:" in response_text:
+        parts = response_text.split("Traditional Chinese:")
+        if len(parts) == 2:
+            fact_text_en = parts[0].replace("English:", "").strip()
+            fact_text_zh_tw = parts[1].strip()
+    elif "English:" in response_text:
+        fact_text_en = response_text.replace("English:", "").strip()
+    elif "Traditional Chinese:" in response_text:
+        fact_text_zh_tw = response_text.replace("Traditional Chinese:", "").strip()
+    else:
+        # Fallback: treat entire response as English
+        fact_text_en = response_text
+
+    return {"text_en": fact_text_en, "text_zh_tw": fact_text_zh_tw}
+
+
+def parse_fact_batch(response_text):
+    """Pull every English / Traditional Chinese pair out of a batch answer, skipping broken ones.
+
+    Headings, numbering and markdown around the facts ('### Fact 3',
+    '**English:**', '1.') are ignored.
+    """
+    text = _FACT_HEADING.sub("", strip_markup(response_text))
+    facts = []
+    for text_en, text_zh_tw in _FACT_PAIR.findall(text):
+        text_zh_tw = _TRAILING_MARKER.sub("", text_zh_tw).strip()
+        if text_en and text_zh_tw:
+            facts.append({"text_en": text_en, "text_zh_tw": text_zh_tw})
+    return facts
+
+
+class FactPool:
+    """Per-(category, model) buffers of ready facts, refilled by a background worker.
+
+    avoid_topics, if given, is called before each batch and returns short
+    descriptions of recent facts for the prompt to steer away from.
+    """
+
+    def __init__(self, client, batch_size=BATCH_SIZE, low_water=LOW_WATER, avoid_topics=None):
+        self.client = client
+        self.avoid_topics = avoid_topics
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self._buffers = {}
+        self._refilling = set()
+        self._retry_at = {}  # (category, model) -> time the cooldown ends
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="fact-prefetch")
+        self.stats = {"batches": 0, "prefetched": 0, "served": 0, "misses": 0, "errors": 0, "last_error": None}
+
+    def depth(self, category, model):
+        with self._lock:
+            return len(self._buffers.get((category, model), ()))
+
+    def is_refilling(self, category, model):
+        with self._lock:
+            return (category, model) in self._refilling
+
+    def pop(self, category, model):
+        """Return a ready fact, or None if the buffer is empty. Starts a refill if needed."""
+        with self._lock:
+            buffer = self._buffers.get((category, model))
+            fact = buffer.popleft() if buffer else None
+            if fact is None:
+                self.stats["misses"] += 1
+            else:
+                self.stats["served"] += 1
+        self.refill_if_low(category, model)
+        return fact
+
+    def refill_if_low(self, category, model):
+        key = (category, model)
+        with self._lock:
+            if len(self._buffers.get(key, ())) >= self.low_water or key in self._refilling:
+                return
+            if time.monotonic() < self._retry_at.get(key, 0):
+                return
+            self._refilling.add(key)
+        self._executor.submit(self._refill, key)
+
+    def _refill(self, key):
+        category, model = key
+        try:
+            avoid = self.avoid_topics() if self.avoid_topics else ()
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": batch_prompt(category, self.batch_size, avoid)}
+                ],
+                stream=False
+            )
+            facts = parse_fact_batch(response.choices[0].message.content.strip())
+            with self._lock:
+                self._buffers.setdefault(key, deque()).extend(facts)
+                self.stats["batches"] += 1
+                self.stats["prefetched"] += len(facts)
+                if not facts:
+                    self._retry_at[key] = time.monotonic() + RETRY_AFTER
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+                self.stats["last_error"] = str(e)
+                self._retry_at[key] = time.monotonic() + RETRY_AFTER
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
@@ -1,18 +1,112 @@
 import os
 import streamlit as st
-import openai
+from llm_client import get_client
+from image_store import get_store, image_source
 from dotenv import load_dotenv
 import re
-import requests
+from concurrent.futures import ThreadPoolExecutor
 
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
 
-# Initialize OpenAI client
-client = openai.OpenAI(
-    api_key=API_KEY,
-    base_url="https://api.poe.com/v1",
-)
+# Shared, pooled OpenAI client (reused across reruns)
+client = get_client(API_KEY)
+
+COLOR_NAMES_EN = {"紅色": "red", "橙色": "orange", "黃色": "yellow", "綠色": "green", "藍色": "blue", "紫色": "purple", "粉紅色": "pink", "白色": "white", "黑色": "black", "金色": "gold"}
+
+# Marker for the image prompt when it is written together with the recipe
+IMAGE_PROMPT_MARKER = "圖片提示："
+
+
+def extract_image_url(content):
+    """Qwen-Image returns the URL inside its text reply - pull it out if needed."""
+    url_match = re.search(r'https?://[^\s\)]+', content)
+    return url_match.group(0) if url_match else content
+
+
+def generate_qwen_image(prompt):
+    """Generate an image with Qwen-Image (following basic_openai.py pattern) and return its URL.
+
+    Only talks to the API, so it is safe to run in a background thread.
+    """
+    qwen_response = client.chat.completions.create(
+        model="Qwen-Image",
+        messages=[
+            {"role": "user", "content": prompt}
+        ],
+        extra_body={
+            "aspect": "3:2",    # Options: "1:1", "3:2", "2:3", "auto"
+            "quality": "high"   # Options: "low", "medium", "high"
+        },
+        stream=False
+    )
+    image_url = extract_image_url(qwen_response.choices[0].message.content)
+    # Start saving the image locally straight away
+    get_store().prefetch(image_url)
+    return image_url
+
+
+def extract_recipe_title(recipe):
+    """Use the first short line of the recipe as its title."""
+    recipe_title = "美味食譜"
+    lines = recipe.split('\n')
+    for line in lines[:5]:  # Check first 5 lines
+        line = line.strip()
+        if line and not line.startswith('#') and len(line) < 100:
+            # Remove markdown formatting
+            recipe_title = re.sub(r'^#+\s*', '', line)
+            recipe_title = re.sub(r'\*\*', '', recipe_title)
+            recipe_title = recipe_title.strip()
+            if recipe_title:
+                break
+    return recipe_title
+
+
+def split_image_prompt(recipe):
+    """Separate the trailing '圖片提示：' line from a combined recipe reply."""
+    match = re.search(r'^\s*\**' + IMAGE_PROMPT_MARKER + r'\**\s*(.+?)\s*$', recipe, re.MULTILINE)
+    if not match:
+        return recipe, None
+    return (recipe[:match.start()] + recipe[match.end():]).strip(), match.group(1).strip()
+
+
+def draft_image_prompt(mood, color, time_of_day, ingredients, cuisine):
+    """Build an image prompt straight from the form, so the image can start before the recipe exists."""
+    parts = ["一張專業、吸引、光線充足嘅美食照片"]
+    if cuisine and cuisine.strip():
+        parts.append(f"{cuisine.strip()}風格菜式")
+    if ingredients and ingredients.strip():
+        parts.append(f"主要食材：{ingredients.strip()}")
+    if color:
+        parts.append(f"以{color}為主色調")
+    if mood:
+        parts.append(f"{mood}嘅氛圍")
+    if time_of_day:
+        parts.append(f"{time_of_day}嘅光線")
+    return "，".join(parts) + "，高質素，精緻擺盤"
+
+
+def image_prompt_request(recipe_title, recipe, mood, color, time_of_day):
+    """Ask the model to turn the finished recipe into an image prompt."""
+    return f"""為呢個食譜創造一個詳細嘅圖片生成提示：{recipe_title}
+            
+            考慮：
+            - 心情：{mood if mood else '任何'}
+            - 顏色主題：{color if color else '任何'}
+            - 時段：{time_of_day if time_of_day else '任何'}
+            - 食譜描述：{recipe[:200]}...
+            
+            只返回一個簡潔、詳細嘅圖片提示（唔好解釋），適合用嚟創造一張吸引、專業嘅食物照片。用繁體中文寫圖片提示。"""
+
+
+def simple_image_prompt(recipe_title, color):
+    color_name = COLOR_NAMES_EN.get(color, "")
+    simple_prompt = f"A beautiful, professional food photograph of {recipe_title}"
+    if color_name:
+        simple_prompt += f" with {color_name} color accents"
+    simple_prompt += ", appetizing, well-lit, high quality"
+    return simple_prompt
+
 
 st.set_page_config(page_title="食譜探索器", page_icon="🍳", layout="wide")
 
@@ -56,6 +150,18 @@ with st.form("recipe_form"):
         help="有冇特定菜系風格？"
     )
     
+    fast_mode = st.checkbox(
+        "⚡ 快速模式",
+        value=True,
+        help="一邊寫食譜一邊用你嘅選擇生成圖片，唔使等食譜寫完"
+    )
+    
+    combined_prompt = st.checkbox(
+        "同食譜一齊寫圖片提示",
+        value=True,
+        help="食譜同圖片提示一次過生成，慳一次 AI 請求（草稿圖片失敗時會用到）"
+    )
+    
     generate_button = st.form_submit_button("✨ 創造我嘅食譜", use_container_width=True, type="primary")
 
 if generate_button:
@@ -107,6 +213,20 @@ if generate_button:
 
 用繁體中文（粵語）寫，要簡潔、有創意、溫暖。食譜要簡短，重點突出，避免冗長描述。"""
     
+    if combined_prompt:
+        system_prompt += f"""
+
+食譜寫完之後，最後另起一行，以「{IMAGE_PROMPT_MARKER}」開頭，寫一句簡潔、詳細嘅圖片生成提示（繁體中文），用嚟生成呢道菜嘅專業食物照片。"""
+    
+    # In fast mode the draft image is generated from the form answers while the recipe is written
+    executor = ThreadPoolExecutor(max_workers=1)
+    draft_future = None
+    if fast_mode:
+        draft_future = executor.submit(
+            generate_qwen_image,
+            draft_image_prompt(question1, question2, question3, question4, question6)
+        )
+    
     with st.spinner("生成緊食譜..."):
         try:
             response = client.chat.completions.create(
@@ -119,93 +239,46 @@ if generate_button:
             )
             
             recipe = response.choices[0].message.content
+            image_prompt = None
+            if combined_prompt:
+                recipe, image_prompt = split_image_prompt(recipe)
             
             # Extract recipe title (first line or first heading)
-            recipe_title = "美味食譜"
-            lines = recipe.split('\n')
-            for line in lines[:5]:  # Check first 5 lines
-                line = line.strip()
-                if line and not line.startswith('#') and len(line) < 100:
-                    # Remove markdown formatting
-                    recipe_title = re.sub(r'^#+\s*', '', line)
-                    recipe_title = re.sub(r'\*\*', '', recipe_title)
-                    recipe_title = recipe_title.strip()
-                    if recipe_title:
-                        break
-            
-            # Generate image prompt using AI
-            image_prompt_text = f"""為呢個食譜創造一個詳細嘅圖片生成提示：{recipe_title}
-            
-            考慮：
-            - 心情：{question1 if question1 else '任何'}
-            - 顏色主題：{question2 if question2 else '任何'}
-            - 時段：{question3 if question3 else '任何'}
-            - 食譜描述：{recipe[:200]}...
-            
-            只返回一個簡潔、詳細嘅圖片提示（唔好解釋），適合用嚟創造一張吸引、專業嘅食物照片。用繁體中文寫圖片提示。"""
+            recipe_title = extract_recipe_title(recipe)
             
             image_url = None
             
             try:
-                # Generate optimized image prompt
-                image_prompt_response = client.chat.completions.create(
-                    model="gemini-2.5-pro",
-                    messages=[
-                        {"role": "user", "content": image_prompt_text}
-                    ],
-                    stream=False
-                )
-                image_prompt = image_prompt_response.choices[0].message.content.strip()
-                
-                # Generate image using Qwen-Image (following basic_openai.py pattern)
                 with st.spinner("用 Qwen-Image 生成緊圖片..."):
-                    try:
-                        # Use chat completions with Qwen-Image model (as shown in basic_openai.py)
-                        qwen_response = client.chat.completions.create(
-                            model="Qwen-Image",
-                            messages=[
-                                {"role": "user", "content": image_prompt}
-                            ],
-                            extra_body={
-                                "aspect": "3:2",    # Options: "1:1", "3:2", "2:3", "auto"
-                                "quality": "high"   # Options: "low", "medium", "high"
-                            },
-                            stream=False
-                        )
-                        # Get image URL from response content (as shown in basic_openai.py)
-                        image_url = qwen_response.choices[0].message.content
-                        
-                        # Extract URL if it's embedded in text
-                        url_match = re.search(r'https?://[^\s\)]+', image_url)
-                        if url_match:
-                            image_url = url_match.group(0)
-                            
-                    except Exception as qwen_error:
-                        # Fallback: try with simple prompt
+                    # 1. Draft image started before the recipe (fast mode)
+                    if draft_future is not None:
+                        try:
+                            image_url = draft_future.result()
+                        except Exception:
+                            image_url = None
+                    
+                    if not image_url:
                         try:
-                            color_name = {"紅色": "red", "橙色": "orange", "黃色": "yellow", "綠色": "green", "藍色": "blue", "紫色": "purple", "粉紅色": "pink", "白色": "white", "黑色": "black", "金色": "gold"}.get(question2, "")
-                            simple_prompt = f"A beautiful, professional food photograph of {recipe_title}"
-                            if color_name:
-                                simple_prompt += f" with {color_name} color accents"
-                            simple_prompt += ", appetizing, well-lit, high quality"
+                            if not image_prompt:
+                                # Generate optimized image prompt
+                                image_prompt_text = image_prompt_request(recipe_title, recipe, question1, question2, question3)
+                                image_prompt_response = client.chat.completions.create(
+                                    model="gemini-2.5-pro",
+                                    messages=[
+                                        {"role": "user", "content": image_prompt_text}
+                                    ],
+                                    stream=False
+                                )
+                                image_prompt = image_prompt_response.choices[0].message.content.strip()
                             
-                            qwen_response = client.chat.completions.create(
-                                model="Qwen-Image",
-                                messages=[
-                                    {"role": "user", "content": simple_prompt}
-                                ],
-                                extra_body={
-                                    "aspect": "3:2",
-                                    "quality": "high"
-                                },
-                                stream=False
-                            )
-                            image_url = qwen_response.choices[0].message.content
-                            url_match = re.search(r'https?://[^\s\)]+', image_url)
-                            if url_match:
-                                image_url = url_match.group(0)
-                        except Exception as e:
-                            raise Exception(f"Qwen-Image generation failed: {str(e)}")
+                            # 2. Image from the recipe's own image prompt
+                            image_url = generate_qwen_image(image_prompt)
+                        except Exception as qwen_error:
+                            # 3. Fallback: try with simple prompt
+                            try:
+                                image_url = generate_qwen_image(simple_image_prompt(recipe_title, question2))
+                            except Exception as e:
+                                raise Exception(f"Qwen-Image generation failed: {str(e)}")
                             
             except Exception as img_error:
                 error_msg = str(img_error)
@@ -217,7 +290,7 @@ if generate_button:
             
             # Display image if generated
             if image_url:
-                st.image(image_url, caption=recipe_title, use_container_width=True)
+                st.image(image_source(image_url), caption=recipe_title, use_container_width=True)
                 st.divider()
             
             st.markdown(recipe)
@@ -236,10 +309,14 @@ if generate_button:
         except Exception as e:
             st.error(f"生成食譜時出錯：{str(e)}")
             st.info("請檢查你嘅 API 金鑰同連線，然後再試一次。")
+        finally:
+            # Don't wait for a draft image nobody will see
+            executor.shutdown(wait=False, cancel_futures=True)
 
 if "last_recipe" in st.session_state:
     with st.expander("查看上次生成嘅食譜"):
         if "last_image_url" in st.session_state and st.session_state.last_image_url:
-            st.image(st.session_state.last_image_url, use_container_width=True)
+            # Served from the local image store - no new download on each rerun
+            st.image(image_source(st.session_state.last_image_url), use_container_width=True)
         st.markdown(st.session_state.last_recipe)
 
@@ -0,0 +1,201 @@
+"""
+Local store for generated images.
+
+The image models give back a URL on someone else's server. Passing that URL
+to st.image() makes the browser download it again on every rerun, and the
+link may stop working after a while. This module downloads each image once,
+in a background thread, and keeps the bytes on disk under the SHA-256 of
+their content (so the same picture is only stored once). st.image() can then
+be given the bytes, which Streamlit serves itself.
+
+When the store grows past max_bytes, the least recently viewed images are
+deleted first.
+
+A URL whose download fails is remembered and not tried again (generated
+image links expire, and an expired one stays expired).
+
+Usage:
+    from image_store import get_store, image_source
+    get_store().prefetch(url)        # start downloading right away
+    st.image(image_source(url))      # bytes from disk, or the URL if they aren't stored (yet)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+STORE_DIR = os.getenv("IMAGE_STORE_DIR", ".image_store")
+MAX_BYTES = int(os.getenv("IMAGE_STORE_MAX_MB", "500")) * 1024 * 1024
+DOWNLOAD_TIMEOUT = 60
+
+
+class ImageStore:
+    """Content-addressed image cache on disk with a size cap and LRU eviction."""
+
+    def __init__(self, root=STORE_DIR, max_bytes=MAX_BYTES, workers=4):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._failed = set()  # URLs whose download failed
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-store")
+        self._session = requests.Session()
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, digest TEXT NOT NULL)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_blobs_last_used ON blobs(last_used)")
+        self._conn.commit()
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _lookup(self, url):
+        row = self._conn.execute("SELECT digest FROM urls WHERE url = ?", (url,)).fetchone()
+        if row and os.path.exists(self._path(row[0])):
+            return row[0]
+        return None
+
+    def prefetch(self, url):
+        """Start downloading url in the background (once) and return its Future.
+
+        Returns None if the URL failed before.
+        """
+        with self._lock:
+            if url in self._failed:
+                return None
+            future = self._pending.get(url)
+            if future is None:
+                future = self._executor.submit(self._download, url)
+                self._pending[url] = future
+                future.add_done_callback(lambda _: self._forget(url))
+            return future
+
+    def _forget(self, url):
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def _download(self, url):
+        with self._lock:
+            digest = self._lookup(url)
+        if digest:
+            return digest
+
+        try:
+            response = self._session.get(url, timeout=DOWNLOAD_TIMEOUT)
+            response.raise_for_status()
+        except Exception:
+            with self._lock:
+                self._failed.add(url)
+            raise
+        data = response.content
+        digest = hashlib.sha256(data).hexdigest()
+
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO urls (url, digest) VALUES (?, ?)", (url, digest))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (digest, size, last_used) VALUES (?, ?, ?)",
+                (digest, len(data), time.time()),
+            )
+            self._evict(keep=digest)
+            self._conn.commit()
+        return digest
+
+    def _evict(self, keep):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for digest, size in self._conn.execute(
+            "SELECT digest, size FROM blobs WHERE digest != ? ORDER BY last_used", (keep,)
+        ).fetchall():
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+            self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            self._conn.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def get(self, url, timeout=DOWNLOAD_TIMEOUT):
+        """Return the image bytes for url, downloading them first if needed.
+
+        Returns None if the image cannot be downloaded.
+        """
+        with self._lock:
+            digest = self._lookup(url)
+        if digest is None:
+            future = self.prefetch(url)
+            if future is None:
+                return None
+            try:
+                digest = future.result(timeout=timeout)
+            except Exception:
+                return None
+        return self._read(digest)
+
+    def stored(self, url):
+        """Return the image bytes for url if they are on disk already, else None (never waits)."""
+        with self._lock:
+            digest = self._lookup(url)
+        return self._read(digest) if digest else None
+
+    def _read(self, digest):
+        try:
+            with open(self._path(digest), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._conn.execute("UPDATE blobs SET last_used = ? WHERE digest = ?", (time.time(), digest))
+            self._conn.commit()
+        return data
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide image store, creating it once."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore()
+        return _store
+
+
+def image_source(url):
+    """Something st.image() can show: the stored bytes, or the URL as a fallback.
+
+    Never waits for a download - this runs while the page is drawn. If the
+    image isn't stored yet, its download is started for the next rerun.
+    """
+    if not url:
+        return url
+    store = get_store()
+    data = store.stored(url)
+    if data is None:
+        store.prefetch(url)
+    return data or url
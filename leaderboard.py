@@ -0,0 +1,171 @@
+"""
+Leaderboard for math_quiz.py, shared by every session and kept on disk.
+
+Each finished quiz is one row in a SQLite table, ranked by score per
+minute within its (difficulty, operation) group:
+
+- Saving never waits for the disk: record() puts the session on a queue
+  and a background thread writes whatever has queued up in one
+  transaction.
+- Top-k reads straight off an index on (difficulty, operation, score per
+  minute), so it touches k rows however many sessions there are.
+- Rank and percentile need to know how many sessions scored higher.
+  Scores per minute are kept to 0.01, and a small table counts the
+  sessions at each value, so that is a sum over the distinct scores of
+  the group (a few thousand rows) instead of a count over its sessions.
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+LEADERBOARD_FILE = os.getenv("QUIZ_LEADERBOARD_FILE", ".quiz_leaderboard.sqlite3")
+
+MIN_QUESTIONS = 10  # fewer answers than this are too short a quiz to rank
+TOP_K = 10
+WRITE_BATCH = 500  # most sessions written in one transaction
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    answered INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    score_per_minute REAL NOT NULL,
+    finished_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_rank
+    ON sessions(difficulty, operation, score_per_minute DESC);
+CREATE TABLE IF NOT EXISTS score_counts (
+    difficulty TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    hundredths INTEGER NOT NULL,
+    sessions INTEGER NOT NULL,
+    PRIMARY KEY (difficulty, operation, hundredths)
+) WITHOUT ROWID;
+"""
+
+
+def score_per_minute(score, seconds):
+    return round(score / seconds * 60, 2) if seconds > 0 else 0.0
+
+
+def hundredths(per_minute):
+    return int(round(per_minute * 100))
+
+
+class Leaderboard:
+    """Finished quiz sessions in SQLite, with batched background writes."""
+
+    def __init__(self, path=LEADERBOARD_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="leaderboard-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, player, difficulty, operation, score, answered, seconds):
+        """Queue one finished session; returns its score per minute (the write happens later)."""
+        per_minute = score_per_minute(score, seconds)
+        finished_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._queue.put((player, difficulty, operation, score, answered, seconds, per_minute, finished_at))
+        return per_minute
+
+    def _write_loop(self):
+        # The writer has its own connection; with WAL, reads carry on while it writes
+        conn = None
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < WRITE_BATCH:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            sessions = [row for row in rows if row is not None]
+            try:
+                if sessions:
+                    if conn is None:
+                        conn = sqlite3.connect(self.path)
+                    self._write(conn, sessions)
+            except Exception:
+                # Keep the writer alive: later sessions may well save (e.g. once disk space is freed)
+                log.exception("Could not save %d leaderboard sessions", len(sessions))
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+            if len(sessions) < len(rows):
+                if conn is not None:
+                    conn.close()
+                return
+
+    @staticmethod
+    def _write(conn, sessions):
+        with conn:
+            conn.executemany(
+                "INSERT INTO sessions (player, difficulty, operation, score, answered, seconds, "
+                "score_per_minute, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                sessions,
+            )
+            conn.executemany(
+                "INSERT INTO score_counts (difficulty, operation, hundredths, sessions) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT DO UPDATE SET sessions = sessions + 1",
+                [(row[1], row[2], hundredths(row[6])) for row in sessions],
+            )
+
+    def flush(self):
+        """Wait until every queued session is on disk."""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+    def top(self, difficulty, operation, k=TOP_K):
+        """The k best sessions of a group, best first (earlier sessions win ties)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM sessions WHERE difficulty = ? AND operation = ? "
+                "ORDER BY score_per_minute DESC, id LIMIT ?",
+                (difficulty, operation, k),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def standing(self, difficulty, operation, per_minute, new=False):
+        """Return (rank, percentile, sessions in the group) for a score per minute.
+
+        rank 1 is the best; percentile is the share of sessions that scored
+        lower. With new=True the score counts as one more session, not yet
+        recorded: call it before record(), as the write happens later.
+        """
+        value = hundredths(per_minute)
+        with self._lock:
+            total, higher, equal = self._conn.execute(
+                "SELECT COALESCE(SUM(sessions), 0), "
+                "COALESCE(SUM(CASE WHEN hundredths > ? THEN sessions END), 0), "
+                "COALESCE(SUM(CASE WHEN hundredths = ? THEN sessions END), 0) "
+                "FROM score_counts WHERE difficulty = ? AND operation = ?",
+                (value, value, difficulty, operation),
+            ).fetchone()
+        if new:
+            # Earlier sessions win ties, so a new score goes after the equal ones
+            higher += equal
+            equal = 1
+            total += 1
+        percentile = (total - higher - equal) / total * 100 if total else 0.0
+        return higher + 1, percentile, total
@@ -0,0 +1,87 @@
+"""
+Shared OpenAI client used by all the apps.
+
+Streamlit re-runs the whole app script on every interaction, so creating
+openai.OpenAI(...) at the top of the script builds a new connection pool
+(and does a new TLS handshake) each time. Imported modules are NOT re-run,
+so get_client() keeps one pooled client per base_url / API key for the
+whole process and hands the same one back on every rerun.
+
+Pool size and timeouts can be changed with environment variables (see the
+LLM_* settings below) or by passing arguments to get_client().
+"""
+
+import os
+import threading
+
+import openai
+
+BASE_URL = "https://api.poe.com/v1"
+
+# Connection pool settings
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "120"))
+
+# Timeouts in seconds (image models can take a while, so reads are generous)
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "180"))
+
+_clients = {}
+_lock = threading.Lock()
+
+
+# The SDK picks its own HTTP library (httpx or httpx2, depending on the
+# version), so the Limits and Timeout classes are taken from the SDK rather
+# than imported separately - objects from the other library don't work there
+_Limits = type(openai.DEFAULT_CONNECTION_LIMITS)
+
+
+def _build_client(api_key, base_url, max_connections, max_keepalive, timeout):
+    http_client = openai.DefaultHttpxClient(
+        limits=_Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        timeout=openai.Timeout(timeout, connect=CONNECT_TIMEOUT),
+    )
+    client = openai.OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=http_client,
+    )
+    return client, http_client
+
+
+def _prewarm(http_client, base_url):
+    """Open a connection in the background so the first real call skips DNS/TLS setup."""
+    try:
+        http_client.head(base_url, timeout=CONNECT_TIMEOUT)
+    except Exception:
+        # Warming is best effort - the real request will simply connect itself
+        pass
+
+
+def get_client(api_key=None, base_url=BASE_URL, max_connections=MAX_CONNECTIONS,
+               max_keepalive=MAX_KEEPALIVE_CONNECTIONS, timeout=READ_TIMEOUT, prewarm=True):
+    """Return the process-wide client for this base_url / API key, creating it once.
+
+    If api_key is not given, the API_KEY environment variable is used.
+    Pool settings only apply the first time a client is created.
+    """
+    if api_key is None:
+        api_key = os.getenv("API_KEY")
+
+    key = (base_url, api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            return client
+
+        client, http_client = _build_client(api_key, base_url, max_connections, max_keepalive, timeout)
+        _clients[key] = client
+
+    if prewarm:
+        threading.Thread(target=_prewarm, args=(http_client, base_url), daemon=True).start()
+    return client
@@ -4,7 +4,8 @@ import json
 import random
 import textwrap
 from datetime import datetime, timedelta
-import openai
+from llm_client import get_client
+from completion_cache import cached_client
 from dotenv import load_dotenv
 import re
 
@@ -14,10 +15,8 @@ COOLDOWN_HOURS = 12
 
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
-client = openai.OpenAI(
-    api_key=API_KEY,
-    base_url="https://api.poe.com/v1",
-)
+# Repeated prompts are answered from the local completion cache
+client = cached_client(get_client(API_KEY))
 
 
 def load_fortunes(path):
@@ -431,3 +430,5 @@ def main():
 
 if __name__ == "__main__":
     main()
+    # After main(), so the counts include this run's requests
+    st.sidebar.caption(client.cache.summary())
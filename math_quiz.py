@@ -1,7 +1,13 @@
 import streamlit as st
-import random
+import secrets
 import time
 from datetime import datetime, timedelta
+from leaderboard import MIN_QUESTIONS, Leaderboard, score_per_minute
+from question_bank import QuestionCursor
+from quiz_events import QuizEventLog
+from quiz_stats import HistoryRing, QuizStats
+from quiz_timer import timer_box
+from rapid_fire import RapidFireRound, rapid_fire
 
 st.set_page_config(
     page_title="Mental Maths Quiz", 
@@ -126,22 +132,40 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-# Initialize session state
-if "score" not in st.session_state:
+@st.cache_resource
+def get_leaderboard():
+    """Leaderboard shared by every session (kept on disk)."""
+    return Leaderboard()
+
+leaderboard = get_leaderboard()
+
+@st.cache_resource
+def get_event_log():
+    """Log of every answered question, for quiz_analytics.py (kept on disk)."""
+    return QuizEventLog()
+
+event_log = get_event_log()
+
+def reset_quiz():
+    """Start a fresh quiz: score, stats, history and timer back to zero."""
     st.session_state.score = 0
     st.session_state.total_questions = 0
     st.session_state.correct_answers = 0
     st.session_state.wrong_answers = 0
     st.session_state.current_question = None
     st.session_state.current_answer = None
-    st.session_state.question_history = []
+    st.session_state.question_history = HistoryRing()
     st.session_state.quiz_started = False
     st.session_state.start_time = None
     st.session_state.last_result = None
     st.session_state.question_start_time = None
-    st.session_state.time_per_question = []
+    st.session_state.quiz_stats = QuizStats()
     st.session_state.total_time = 0
-    st.session_state.last_refresh_time = None
+    st.session_state.quiz_session = secrets.randbits(63)  # groups this quiz's answers in the event log
+
+# Initialize session state
+if "score" not in st.session_state:
+    reset_quiz()
 
 # Sidebar for settings
 with st.sidebar:
@@ -159,6 +183,11 @@ with st.sidebar:
         help="Choose which operations to practice"
     )
     
+    rapid_mode = st.toggle(
+        "⚡ Rapid-fire mode",
+        help="Keyboard only: type the answer, press Enter, next question - no waiting for the server"
+    )
+    
     st.markdown("---")
     st.header("📊 Statistics")
     
@@ -173,9 +202,14 @@ with st.sidebar:
             st.metric("Accuracy", f"{accuracy:.1f}%")
     
     # Time statistics
-    if st.session_state.total_questions > 0 and st.session_state.time_per_question:
-        avg_time = sum(st.session_state.time_per_question) / len(st.session_state.time_per_question)
-        st.metric("Avg Time/Question", f"{avg_time:.1f}s")
+    quiz_stats = st.session_state.quiz_stats
+    if st.session_state.total_questions > 0 and quiz_stats.overall.answered:
+        st.metric("Avg Time/Question", f"{quiz_stats.avg_time:.1f}s")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Median Time", f"{quiz_stats.p50:.1f}s", help="Half of your answers were faster than this")
+        with col2:
+            st.metric("p90 Time", f"{quiz_stats.p90:.1f}s", help="9 out of 10 answers were faster than this")
         
         if st.session_state.total_time > 0:
             questions_per_minute = (st.session_state.total_questions / st.session_state.total_time) * 60
@@ -186,197 +220,89 @@ with st.sidebar:
         score_per_second = st.session_state.correct_answers / st.session_state.total_time
         st.metric("Score/Time", f"{score_per_second:.2f}/s")
     
+    # Per-operation breakdown
+    if quiz_stats.by_operation:
+        with st.expander("🔍 By Operation"):
+            for op_name, op_stats in quiz_stats.by_operation.items():
+                st.markdown(
+                    f"**{op_name}**: {op_stats.correct}/{op_stats.answered} correct "
+                    f"({op_stats.accuracy:.0f}%) · avg {op_stats.time.mean:.1f}s "
+                    f"± {op_stats.time.std:.1f}s · p90 {op_stats.histogram.percentile(0.9):.1f}s"
+                )
+    
+    # Leaderboard for the current difficulty and operation
     st.markdown("---")
-    if st.button("🔄 Reset Quiz", use_container_width=True, type="primary"):
-        st.session_state.score = 0
-        st.session_state.total_questions = 0
-        st.session_state.correct_answers = 0
-        st.session_state.wrong_answers = 0
-        st.session_state.current_question = None
-        st.session_state.current_answer = None
-        st.session_state.question_history = []
-        st.session_state.quiz_started = False
-        st.session_state.start_time = None
-        st.session_state.last_result = None
-        st.session_state.question_start_time = None
-        st.session_state.time_per_question = []
-        st.session_state.total_time = 0
-        st.session_state.last_refresh_time = None
+    st.header("🏆 Leaderboard")
+    board_level = difficulty.split()[0]
+    board_op = "All" if operation_type == "All Operations" else operation_type.split()[0]
+    player_name = st.text_input("Your name:", max_chars=30, key="player_name")
+    can_save = bool(player_name.strip()) and st.session_state.total_questions >= MIN_QUESTIONS
+    if st.button("🏁 Finish & Save Score", use_container_width=True, disabled=not can_save,
+                 help=f"Answer at least {MIN_QUESTIONS} questions to get on the leaderboard"):
+        # Time spent answering, not time the page was open
+        per_minute = score_per_minute(st.session_state.correct_answers, st.session_state.total_time)
+        # Standing first: the saved session only reaches the database a moment later
+        standing = leaderboard.standing(board_level, board_op, per_minute, new=True)
+        leaderboard.record(
+            player_name.strip(), board_level, board_op, st.session_state.correct_answers,
+            st.session_state.total_questions, st.session_state.total_time
+        )
+        st.session_state.leaderboard_result = (board_level, board_op, per_minute, *standing)
+        reset_quiz()
         st.rerun()
-
-# Function to generate a question
-def generate_question(difficulty_level, operation):
-    max_number_map = {
-        "Easy 🟢": 20,
-        "Medium 🟡": 100,
-        "Hard 🔴": 1000
-    }
-    max_num = max_number_map[difficulty_level]
     
-    if operation == "All Operations":
-        operation = random.choice(["Addition", "Subtraction", "Multiplication", "Division"])
+    saved = st.session_state.get("leaderboard_result")
+    if saved:
+        level, op, per_minute, rank, percentile, total = saved
+        st.success(f"Saved: {per_minute:.2f} score/min ({level}, {op}) - "
+                   f"rank #{rank:,} of {total:,}, better than {percentile:.0f}% of quizzes")
     
-    operation_map = {
-        "Addition ➕": "Addition",
-        "Subtraction ➖": "Subtraction",
-        "Multiplication ✖️": "Multiplication",
-        "Division ➗": "Division"
-    }
-    
-    op = operation_map.get(operation, operation)
-    
-    if op == "Addition":
-        num1 = random.randint(1, max_num)
-        num2 = random.randint(1, max_num)
-        answer = num1 + num2
-        question = f"{num1} + {num2} = ?"
-        symbol = "➕"
-        
-    elif op == "Subtraction":
-        num1 = random.randint(1, max_num)
-        num2 = random.randint(1, num1)  # Ensure positive result
-        answer = num1 - num2
-        question = f"{num1} - {num2} = ?"
-        symbol = "➖"
-        
-    elif op == "Multiplication":
-        if difficulty_level == "Easy 🟢":
-            num1 = random.randint(1, 10)
-            num2 = random.randint(1, 10)
-        elif difficulty_level == "Medium 🟡":
-            num1 = random.randint(1, 20)
-            num2 = random.randint(1, 20)
-        else:  # Hard
-            num1 = random.randint(1, 50)
-            num2 = random.randint(1, 50)
-        answer = num1 * num2
-        question = f"{num1} × {num2} = ?"
-        symbol = "✖️"
-        
-    else:  # Division
-        if difficulty_level == "Easy 🟢":
-            num2 = random.randint(2, 10)
-            num1 = num2 * random.randint(1, 10)
-        elif difficulty_level == "Medium 🟡":
-            num2 = random.randint(2, 20)
-            num1 = num2 * random.randint(1, 20)
-        else:  # Hard
-            num2 = random.randint(2, 50)
-            num1 = num2 * random.randint(1, 50)
-        answer = num1 // num2
-        question = f"{num1} ÷ {num2} = ?"
-        symbol = "➗"
+    with st.expander(f"Top {board_level} · {board_op}"):
+        top = leaderboard.top(board_level, board_op)
+        if not top:
+            st.caption("No scores yet - be the first!")
+        for place, entry in enumerate(top, 1):
+            st.markdown(f"**{place}.** {entry['player']} - {entry['score_per_minute']:.2f}/min "
+                        f"({entry['score']}/{entry['answered']})")
     
-    return {
-        "question": question,
-        "answer": answer,
-        "symbol": symbol,
-        "operation": op
-    }
-
-# Initialize start time when page first loads
-if st.session_state.start_time is None:
-    st.session_state.start_time = time.time()
-    st.session_state.last_refresh_time = time.time()
-
-# Generate new question if needed
-if st.session_state.current_question is None:
-    st.session_state.current_question = generate_question(difficulty, operation_type)
-    st.session_state.quiz_started = True
-    if st.session_state.question_start_time is None:
-        st.session_state.question_start_time = time.time()
+    st.markdown("---")
+    if st.button("🔄 Reset Quiz", use_container_width=True, type="primary"):
+        reset_quiz()
+        st.rerun()
 
-# Count-up timer - updates every second
-question_data = st.session_state.current_question
-current_time = time.time()
-
-# Initialize last_refresh_time if not set
-if st.session_state.last_refresh_time is None:
-    st.session_state.last_refresh_time = current_time
-
-# Calculate elapsed time from start
-elapsed_time = current_time - st.session_state.start_time
-minutes = int(elapsed_time // 60)
-seconds = int(elapsed_time % 60)
-
-# Calculate score per minute
-score_per_minute = 0
-if elapsed_time > 0:
-    score_per_minute = (st.session_state.correct_answers / elapsed_time) * 60
-
-# Display count-up timer with score per minute
-timer_display = f"{minutes:02d}:{seconds:02d}"
-st.markdown(f"""
-<div class="timer-box">
-    ⏱️ Elapsed Time: {timer_display}
-    <div class="timer-info">Score/Minute: {score_per_minute:.2f}</div>
-</div>
-""", unsafe_allow_html=True)
+# Questions come from pre-generated banks shared by every session (see
+# question_bank.py); each session's cursor never repeats a question until
+# it has seen all of them
+if "question_cursor" not in st.session_state:
+    st.session_state.question_cursor = QuestionCursor()
 
-# Display current question
-st.markdown(f"""
-<div class="question-box">
-    <p class="question-text">{question_data['symbol']} {question_data['question']}</p>
-</div>
-""", unsafe_allow_html=True)
+# Function to generate a question
+def generate_question(difficulty_level, operation):
+    level = difficulty_level.split()[0]
+    op = None if operation == "All Operations" else operation.split()[0]
+    return st.session_state.question_cursor.next_question(level, op)
 
-# Answer input section
-st.markdown("---")
-st.markdown("### 💭 Enter Your Answer")
-
-col_input1, col_input2, col_input3 = st.columns([1, 3, 1])
-with col_input2:
-    user_answer = st.number_input(
-        "Your Answer:",
-        value=None,
-        step=1,
-        format="%d",
-        key="answer_input",
-        help="Enter your answer",
-        label_visibility="collapsed"
-    )
+def time_text(time_ms):
+    return f" (Time: {time_ms / 1000:.1f}s)" if time_ms is not None else ""
 
-# Submit button
-col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
-with col_btn2:
-    submit_clicked = st.button("✅ Submit Answer", type="primary", use_container_width=True)
-
-# Check answer
-if submit_clicked and user_answer is not None:
-    # Calculate time taken for this question
-    if st.session_state.question_start_time:
-        time_taken = time.time() - st.session_state.question_start_time
-        st.session_state.time_per_question.append(time_taken)
-        st.session_state.total_time += time_taken
-    
+def record_answer(question_data, user_answer, time_taken):
+    """Count one answered question in the score, stats, history and event log; returns (correct, time in ms)."""
     st.session_state.total_questions += 1
     correct = user_answer == question_data['answer']
     
+    # Time taken for this question
+    time_ms = None
+    if time_taken is not None:
+        st.session_state.quiz_stats.record(question_data['operation'], correct, time_taken)
+        st.session_state.total_time += time_taken
+        time_ms = round(time_taken * 1000)
+    event_log.record(st.session_state.quiz_session, question_data, user_answer, correct, time_ms)
+    
     if correct:
         st.session_state.correct_answers += 1
         st.session_state.score += 1
-        result_class = "correct-answer"
-        result_emoji = "✅"
-        result_text = "Correct! Well done!"
     else:
         st.session_state.wrong_answers += 1
-        result_class = "wrong-answer"
-        result_emoji = "❌"
-        result_text = f"Wrong! The correct answer is {question_data['answer']}"
-    
-    # Calculate time taken for display
-    time_taken_display = ""
-    if st.session_state.question_start_time:
-        time_taken = time.time() - st.session_state.question_start_time
-        time_taken_display = f" (Time: {time_taken:.1f}s)"
-    
-    st.session_state.last_result = {
-        "correct": correct,
-        "user_answer": user_answer,
-        "correct_answer": question_data['answer'],
-        "question": question_data['question'],
-        "time_taken": time_taken_display
-    }
     
     # Add to history
     st.session_state.question_history.append({
@@ -384,44 +310,121 @@ if submit_clicked and user_answer is not None:
         "user_answer": user_answer,
         "correct_answer": question_data['answer'],
         "correct": correct,
-        "time_taken": time_taken_display
+        "time_ms": time_ms
     })
-    
-    # Generate new question
+    return correct, time_ms
+
+def sync_rapid_results():
+    """Rapid-fire callback: score the answers the browser sent back."""
+    payload = (st.session_state.get("rapid_fire") or {}).get("results")
+    for question, user_answer, time_taken in st.session_state.rapid_round.accept(payload):
+        record_answer(question, user_answer, time_taken)
+
+# Initialize start time when page first loads
+if st.session_state.start_time is None:
+    st.session_state.start_time = time.time()
+
+# Generate new question if needed
+if st.session_state.current_question is None:
     st.session_state.current_question = generate_question(difficulty, operation_type)
-    st.session_state.question_start_time = time.time()
-    st.rerun()
-
-# Display last result
-if st.session_state.last_result:
-    result = st.session_state.last_result
-    result_class = "correct-answer" if result["correct"] else "wrong-answer"
-    result_emoji = "✅" if result["correct"] else "❌"
-    
-    if result.get("timeout"):
-        result_text = f"⏱️ Time's up! The correct answer is **{result['correct_answer']}**"
-    elif result["correct"]:
-        time_info = result.get("time_taken", "")
-        result_text = f"Correct! Well done! 🎉{time_info}"
-    else:
-        time_info = result.get("time_taken", "")
-        result_text = f"Wrong! The correct answer is **{result['correct_answer']}**{time_info}"
-    
+    st.session_state.quiz_started = True
+    if st.session_state.question_start_time is None:
+        st.session_state.question_start_time = time.time()
+
+# Count-up timer - refreshes itself every second (see quiz_timer.py)
+question_data = st.session_state.current_question
+timer_box()
+
+if rapid_mode:
+    # Questions are answered and checked in the browser (see rapid_fire.py)
+    round_key = (difficulty.split()[0], None if operation_type == "All Operations" else operation_type.split()[0])
+    rapid_round = st.session_state.get("rapid_round")
+    if rapid_round is None or (rapid_round.difficulty, rapid_round.operation) != round_key:
+        rapid_round = st.session_state.rapid_round = RapidFireRound(*round_key)
+    rapid_round.top_up(st.session_state.question_cursor)
+    st.markdown("### ⚡ Rapid-Fire")
+    st.caption("Type each answer and press Enter - the next question appears straight away. "
+               "Your stats below catch up every few answers.")
+    rapid_fire(rapid_round, on_results=sync_rapid_results)
+else:
+    # Display current question
     st.markdown(f"""
-    <div class="result-box {result_class}">
-        <h3 style="text-align: center; margin: 0;">
-            {result_emoji} {result_text}
-        </h3>
+    <div class="question-box">
+        <p class="question-text">{question_data['symbol']} {question_data['question']}</p>
     </div>
     """, unsafe_allow_html=True)
 
-# Next question button (only show if there's a result)
-if st.session_state.last_result:
-    col_next1, col_next2, col_next3 = st.columns([1, 1, 1])
-    with col_next2:
-        if st.button("➡️ Next Question", use_container_width=True, type="primary"):
-            st.session_state.last_result = None
-            st.rerun()
+    # Answer input section
+    st.markdown("---")
+    st.markdown("### 💭 Enter Your Answer")
+
+    col_input1, col_input2, col_input3 = st.columns([1, 3, 1])
+    with col_input2:
+        user_answer = st.number_input(
+            "Your Answer:",
+            value=None,
+            step=1,
+            format="%d",
+            key="answer_input",
+            help="Enter your answer",
+            label_visibility="collapsed"
+        )
+
+    # Submit button
+    col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
+    with col_btn2:
+        submit_clicked = st.button("✅ Submit Answer", type="primary", use_container_width=True)
+    
+    # Check answer
+    if submit_clicked and user_answer is not None:
+        time_taken = None
+        if st.session_state.question_start_time:
+            time_taken = time.time() - st.session_state.question_start_time
+        correct, time_ms = record_answer(question_data, user_answer, time_taken)
+        
+        st.session_state.last_result = {
+            "correct": correct,
+            "user_answer": user_answer,
+            "correct_answer": question_data['answer'],
+            "question": question_data['question'],
+            "time_ms": time_ms
+        }
+        
+        # Generate new question
+        st.session_state.current_question = generate_question(difficulty, operation_type)
+        st.session_state.question_start_time = time.time()
+        st.rerun()
+    
+    # Display last result
+    if st.session_state.last_result:
+        result = st.session_state.last_result
+        result_class = "correct-answer" if result["correct"] else "wrong-answer"
+        result_emoji = "✅" if result["correct"] else "❌"
+    
+        if result.get("timeout"):
+            result_text = f"⏱️ Time's up! The correct answer is **{result['correct_answer']}**"
+        elif result["correct"]:
+            time_info = time_text(result.get("time_ms"))
+            result_text = f"Correct! Well done! 🎉{time_info}"
+        else:
+            time_info = time_text(result.get("time_ms"))
+            result_text = f"Wrong! The correct answer is **{result['correct_answer']}**{time_info}"
+    
+        st.markdown(f"""
+        <div class="result-box {result_class}">
+            <h3 style="text-align: center; margin: 0;">
+                {result_emoji} {result_text}
+            </h3>
+        </div>
+        """, unsafe_allow_html=True)
+
+    # Next question button (only show if there's a result)
+    if st.session_state.last_result:
+        col_next1, col_next2, col_next3 = st.columns([1, 1, 1])
+        with col_next2:
+            if st.button("➡️ Next Question", use_container_width=True, type="primary"):
+                st.session_state.last_result = None
+                st.rerun()
 
 # Display statistics and history
 st.markdown("---")
@@ -491,8 +494,8 @@ if st.session_state.total_questions > 0:
         """.format(time_display), unsafe_allow_html=True)
     
     with col_time2:
-        if st.session_state.time_per_question:
-            avg_time = sum(st.session_state.time_per_question) / len(st.session_state.time_per_question)
+        if st.session_state.quiz_stats.overall.answered:
+            avg_time = st.session_state.quiz_stats.avg_time
             st.markdown("""
             <div class="stats-card">
                 <div class="metric-label">⚡ Avg Time/Q</div>
@@ -547,11 +550,11 @@ if st.session_state.question_history:
     st.subheader("📜 Recent Questions")
     
     # Show last 10 questions in a nicer format
-    recent_history = list(reversed(st.session_state.question_history[-10:]))
+    recent_history = st.session_state.question_history.recent(10)
     for i, q in enumerate(recent_history, 1):
         status = "✅" if q["correct"] else "❌"
         timeout_marker = " ⏱️" if q.get("timeout") else ""
-        time_info = q.get("time_taken", "")
+        time_info = time_text(q.get("time_ms"))
         user_ans = q['user_answer'] if q['user_answer'] is not None else "Timeout"
         
         st.markdown(f"""
@@ -565,13 +568,3 @@ if st.session_state.question_history:
 # Instructions
 if not st.session_state.quiz_started:
     st.info("👆 Configure your quiz settings in the sidebar and start answering questions!")
-
-# Auto-refresh timer every second (at the end to avoid interrupting user interactions)
-current_time_end = time.time()
-if st.session_state.last_refresh_time is None:
-    st.session_state.last_refresh_time = current_time_end
-
-time_since_last_refresh = current_time_end - st.session_state.last_refresh_time
-if time_since_last_refresh >= 1.0:
-    st.session_state.last_refresh_time = current_time_end
-    st.rerun()
@@ -1,8 +1,11 @@
 import streamlit as st
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-import openai
+from llm_client import get_client
+from completion_cache import cached_client
+from image_store import get_store, image_source
 
 # Load environment variables
 load_dotenv()
@@ -13,10 +16,8 @@ if not API_KEY:
     st.error("API_KEY not found. Please check your .env file.")
     st.stop()
 
-client = openai.OpenAI(
-    api_key=API_KEY,
-    base_url="https://api.poe.com/v1",
-)
+# Repeated prompts are answered from the local completion cache
+client = cached_client(get_client(API_KEY))
 
 def extract_url(text):
     """
@@ -26,6 +27,23 @@ def extract_url(text):
     match = re.search(pattern, text)
     return match.group(0) if match else None
 
+def generate_pet_image(pet_name):
+    """
+    Asks GPT-Image-1.5 for a photo of the pet and returns the image URL (or None).
+    Runs in a worker thread, so it must not call any st.* functions.
+    """
+    img_response = client.chat.completions.create(
+        model="GPT-Image-1.5",
+        messages=[{"role": "user", "content": f"A high-quality, professional photo of a {pet_name}"}],
+        cache=False  # image URLs expire long before a cached reply would
+    )
+    raw_content = img_response.choices[0].message.content
+    image_url = extract_url(raw_content)
+    if image_url:
+        # Start saving the image locally straight away
+        get_store().prefetch(image_url)
+    return image_url
+
 def main():
     st.set_page_config(page_title="Pet Matchmaker", page_icon="🐾", layout="wide")
     
@@ -60,9 +78,8 @@ def main():
                 
                 st.success("Here are your top 3 pet matches!")
                 
-                # Display results in columns
-                cols = st.columns(3)
-                
+                # Parse the three matches first
+                pets = []
                 for i, line in enumerate(lines[:3]):
                     # Extract name and description
                     if "|" in line:
@@ -72,29 +89,40 @@ def main():
                     else:
                         pet_name = f"Match {i+1}"
                         reason = line
-
-                    with cols[i]:
-                        # 2. Generate Image for each pet
+                    pets.append((pet_name, reason))
+                
+                # Display results in columns, with a placeholder where each image will go
+                cols = st.columns(3)
+                image_slots = []
+                for col, (pet_name, reason) in zip(cols, pets):
+                    with col:
+                        slot = st.empty()
+                        slot.info("🎨 Generating image...")
+                        image_slots.append(slot)
+                        st.subheader(pet_name)
+                        st.write(reason)
+                
+                # 2. Generate all images at the same time and fill each column as soon as its image is ready
+                with ThreadPoolExecutor(max_workers=3) as executor:
+                    futures = {
+                        executor.submit(generate_pet_image, pet_name): slot
+                        for (pet_name, _), slot in zip(pets, image_slots)
+                    }
+                    for future in as_completed(futures):
+                        slot = futures[future]
                         try:
-                            img_response = client.chat.completions.create(
-                                model="GPT-Image-1.5",
-                                messages=[{"role": "user", "content": f"A high-quality, professional photo of a {pet_name}"}]
-                            )
-                            raw_content = img_response.choices[0].message.content
-                            image_url = extract_url(raw_content)
-                            
+                            image_url = future.result()
                             if image_url:
-                                st.image(image_url, use_container_width=True)
+                                slot.image(image_source(image_url), use_container_width=True)
                             else:
-                                st.info("Image could not be generated.")
+                                slot.info("Image could not be generated.")
                         except Exception as e:
-                            st.error(f"Image error: {e}")
-                        
-                        st.subheader(pet_name)
-                        st.write(reason)
+                            slot.error(f"Image error: {e}")
 
             except Exception as e:
                 st.error(f"An error occurred: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    # After main(), so the counts include this run's requests
+    st.sidebar.caption(client.cache.summary())
\ No newline at end of file
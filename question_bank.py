@@ -0,0 +1,141 @@
+"""
+Question bank for math_quiz.py.
+
+Every possible question for a (difficulty, operation) pair is generated at
+once with NumPy, shuffled with a fixed seed and kept as compact arrays
+(first number, second number, answer, operation code). A bank is built the
+first time it is needed and then shared by every session.
+
+Each session walks through a bank with its own QuestionCursor: position
+i of the walk is bank[(offset + i * step) % size], where step has no common
+factor with size. That visits every question exactly once before any
+question repeats, takes O(1) time per question, and stores three numbers
+per bank instead of a shuffled copy.
+
+Question sizes (number ranges as before):
+- Addition: both numbers 1..max (20 / 100 / 1000)
+- Subtraction: 1..max, second number not bigger than the first
+- Multiplication: both numbers 1..10 / 20 / 50
+- Division: divisor 2..10 / 20 / 50, whole-number answer 1..10 / 20 / 50
+"""
+
+import math
+import random
+from functools import lru_cache
+
+import numpy as np
+
+BANK_SEED = 20240901
+
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+OPERATIONS = ["Addition", "Subtraction", "Multiplication", "Division"]
+SYMBOLS = {"Addition": "➕", "Subtraction": "➖", "Multiplication": "✖️", "Division": "➗"}
+SIGNS = {"Addition": "+", "Subtraction": "-", "Multiplication": "×", "Division": "÷"}
+
+MAX_NUMBER = {"Easy": 20, "Medium": 100, "Hard": 1000}     # addition / subtraction
+MAX_FACTOR = {"Easy": 10, "Medium": 20, "Hard": 50}        # multiplication / division
+
+
+def _pairs(first, second):
+    """Every (a, b) with a from `first` and b from `second`, as two flat arrays."""
+    a, b = np.meshgrid(first, second, indexing="ij")
+    return a.ravel(), b.ravel()
+
+
+def build_bank_arrays(difficulty, operation):
+    """(num1, num2, answer) arrays holding every question, in a fixed shuffled order."""
+    if operation == "Addition":
+        numbers = np.arange(1, MAX_NUMBER[difficulty] + 1, dtype=np.int32)
+        num1, num2 = _pairs(numbers, numbers)
+        answer = num1 + num2
+    elif operation == "Subtraction":
+        numbers = np.arange(1, MAX_NUMBER[difficulty] + 1, dtype=np.int32)
+        num1, num2 = _pairs(numbers, numbers)
+        keep = num2 <= num1  # ensure a positive (or zero) result
+        num1, num2 = num1[keep], num2[keep]
+        answer = num1 - num2
+    elif operation == "Multiplication":
+        factors = np.arange(1, MAX_FACTOR[difficulty] + 1, dtype=np.int32)
+        num1, num2 = _pairs(factors, factors)
+        answer = num1 * num2
+    elif operation == "Division":
+        factors = np.arange(1, MAX_FACTOR[difficulty] + 1, dtype=np.int32)
+        num2, answer = _pairs(factors[1:], factors)
+        num1 = num2 * answer
+    else:
+        raise ValueError(f"Unknown operation: {operation}")
+
+    rng = np.random.default_rng([BANK_SEED, DIFFICULTIES.index(difficulty), OPERATIONS.index(operation)])
+    order = rng.permutation(len(num1))
+    # All values fit in 16 bits (largest is 2000 for Hard addition)
+    return num1[order].astype(np.int16), num2[order].astype(np.int16), answer[order].astype(np.int16)
+
+
+class QuestionBank:
+    """Every question of one (difficulty, operation) pair, as arrays."""
+
+    def __init__(self, difficulty, operation):
+        self.difficulty = difficulty
+        self.operation = operation
+        self.op_code = OPERATIONS.index(operation)
+        self.num1, self.num2, self.answer = build_bank_arrays(difficulty, operation)
+
+    def __len__(self):
+        return len(self.answer)
+
+    @property
+    def nbytes(self):
+        return self.num1.nbytes + self.num2.nbytes + self.answer.nbytes
+
+    def question(self, index):
+        """Question at `index`, in the dict format math_quiz.py uses."""
+        num1, num2, answer = int(self.num1[index]), int(self.num2[index]), int(self.answer[index])
+        return {
+            "question": f"{num1} {SIGNS[self.operation]} {num2} = ?",
+            "answer": answer,
+            "symbol": SYMBOLS[self.operation],
+            "operation": self.operation,
+            "difficulty": self.difficulty,
+            "num1": num1,
+            "num2": num2,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_bank(difficulty, operation):
+    """The shared bank for a (difficulty, operation) pair, built on first use."""
+    return QuestionBank(difficulty, operation)
+
+
+class QuestionCursor:
+    """One session's position in each bank: no question repeats until a bank is used up."""
+
+    def __init__(self, seed=None):
+        self._rng = random.Random(seed)
+        self._walks = {}  # (difficulty, operation) -> [offset, step, position]
+
+    def _new_walk(self, size):
+        step = self._rng.randrange(1, size) if size > 1 else 1
+        while math.gcd(step, size) != 1:
+            step = self._rng.randrange(1, size)
+        return [self._rng.randrange(size), step, 0]
+
+    def next_question(self, difficulty, operation=None):
+        """Next question; operation None picks one of the four at random each time."""
+        if operation is None:
+            operation = self._rng.choice(OPERATIONS)
+        bank = get_bank(difficulty, operation)
+        size = len(bank)
+        walk = self._walks.get((difficulty, operation))
+        if walk is None or walk[2] >= size:
+            # First use, or every question has been asked: start a fresh walk
+            walk = self._walks[(difficulty, operation)] = self._new_walk(size)
+        offset, step, position = walk
+        walk[2] += 1
+        return bank.question((offset + position * step) % size)
+
+    def remaining(self, difficulty, operation):
+        """Questions left before this bank starts repeating."""
+        walk = self._walks.get((difficulty, operation))
+        size = len(get_bank(difficulty, operation))
+        return size if walk is None else size - walk[2]
@@ -0,0 +1,122 @@
+"""
+================================================================================
+MATHS QUIZ ANALYTICS
+================================================================================
+Reads the answer event log written by math_quiz.py (see quiz_events.py)
+into NumPy arrays and summarises it:
+
+- per difficulty and operation: answers, accuracy and answer-time
+  percentiles (p50 / p90 / p99) - the times only over answers that were
+  timed
+- the speed curve: median answer time for the 1st, 2nd, 3rd... question
+  of a quiz, to see how quickly students warm up
+
+Everything is done with whole-array operations (one sort, bincount), so
+millions of events take a few seconds at most.
+
+Run it with:
+    python quiz_analytics.py [event log folder]
+================================================================================
+"""
+
+import glob
+import os
+import sys
+
+import numpy as np
+
+from question_bank import DIFFICULTIES, OPERATIONS
+from quiz_events import EVENT_DIR, EVENT_DTYPE, load_event_file
+
+PERCENTILES = [50, 90, 99]
+CURVE_LENGTH = 20  # questions per quiz shown in the speed curve
+
+
+def load_events(log_dir=EVENT_DIR):
+    """Every event in the log folder, oldest file first, as one structured array."""
+    paths = sorted(glob.glob(os.path.join(log_dir, "events-*.bin")))
+    if not paths:
+        return np.empty(0, dtype=EVENT_DTYPE)
+    return np.concatenate([load_event_file(path) for path in paths])
+
+
+def operation_summary(events):
+    """Rows of (difficulty, operation, answers, accuracy %, [p50, p90, p99] ms)."""
+    group = events["difficulty"].astype(np.int64) * len(OPERATIONS) + events["operation"]
+    groups = len(DIFFICULTIES) * len(OPERATIONS)
+    answers = np.bincount(group, minlength=groups)
+    correct = np.bincount(group, weights=events["correct"], minlength=groups)
+
+    # Sort once by (group, time) - as one int64 key, which sorts faster than two;
+    # each group's times are then one sorted slice
+    timed = events["timed"]
+    timed_group = group[timed]
+    timed_answers = np.bincount(timed_group, minlength=groups)
+    times = np.sort((timed_group << 32) | events["time_ms"][timed]) & 0xFFFFFFFF
+    ends = np.cumsum(timed_answers)
+
+    rows = []
+    for g in np.flatnonzero(answers):
+        group_times = times[ends[g] - timed_answers[g]:ends[g]]
+        if len(group_times):
+            # Sorted already, so a percentile is an index lookup
+            positions = np.minimum((np.array(PERCENTILES) / 100 * len(group_times)).astype(int), len(group_times) - 1)
+            percentiles = group_times[positions].tolist()
+        else:
+            percentiles = [None] * len(PERCENTILES)
+        rows.append((
+            DIFFICULTIES[g // len(OPERATIONS)],
+            OPERATIONS[g % len(OPERATIONS)],
+            int(answers[g]),
+            float(correct[g] / answers[g] * 100),
+            percentiles,
+        ))
+    return rows
+
+
+def speed_curve(events, length=CURVE_LENGTH):
+    """Median answer time (ms) of the 1st .. length-th question of a quiz, and how many quizzes got that far."""
+    # The log is written in time order, so a stable sort by quiz keeps each quiz's answers in order
+    order = np.argsort(events["session"], kind="stable")
+    sessions = events["session"][order]
+    times = events["time_ms"][order]
+    timed = events["timed"][order]
+
+    # Position of each answer within its quiz: index minus the index where the quiz starts
+    index = np.arange(len(sessions))
+    starts = np.ones(len(sessions), dtype=bool)
+    starts[1:] = sessions[1:] != sessions[:-1]
+    position = index - np.maximum.accumulate(np.where(starts, index, 0))
+
+    keep = (position < length) & timed  # untimed answers still count towards the position
+    position = position[keep]
+    times = np.sort((position << 32) | times[keep]) & 0xFFFFFFFF  # by (position, time)
+    counts = np.bincount(position, minlength=length)
+    ends = np.cumsum(counts)
+    medians = [
+        int(times[end - count + count // 2]) if count else None
+        for count, end in zip(counts, ends)
+    ]
+    return medians, counts.tolist()
+
+
+if __name__ == "__main__":
+    log_dir = sys.argv[1] if len(sys.argv) > 1 else EVENT_DIR
+    events = load_events(log_dir)
+    print(f"{len(events):,} answers in {log_dir}")
+    if not len(events):
+        sys.exit()
+
+    labels = " | ".join(f"p{p:<2} ms" for p in PERCENTILES)
+    print(f"\n{'Difficulty':<10} | {'Operation':<14} | {'Answers':>10} | {'Accuracy':>8} | {labels}")
+    print("-" * 80)
+    for difficulty, operation, answers, accuracy, times in operation_summary(events):
+        columns = " | ".join(f"{'-' if t is None else t:>6}" for t in times)
+        print(f"{difficulty:<10} | {operation:<14} | {answers:>10,} | {accuracy:>7.1f}% | {columns}")
+
+    medians, counts = speed_curve(events)
+    print(f"\n{'Question':>8} | {'Quizzes':>10} | {'median ms':>10}")
+    print("-" * 36)
+    for n, (median, count) in enumerate(zip(medians, counts), 1):
+        if count:
+            print(f"{n:>8} | {count:>10,} | {median:>10}")
@@ -0,0 +1,132 @@
+"""
+================================================================================
+MATHS QUIZ TIMER BENCHMARK
+================================================================================
+Measures the CPU cost of keeping the quiz timer ticking, per open quiz:
+
+- before: every second the whole of math_quiz.py re-ran (styles, question,
+  stats cards, history) just to update the elapsed time
+- now: every second only the timer fragment in quiz_timer.py re-runs
+
+Both are timed with Streamlit's built-in app tester (no browser needed),
+after 50 answered questions so the stats and history are on the page.
+
+It also times the question bank (question_bank.py): building the largest
+bank (Hard addition, 1,000,000 questions) and serving one question, and
+the leaderboard (leaderboard.py): top-10 and rank/percentile queries with
+1,000,000 recorded sessions in one (difficulty, operation) group.
+
+The quizzes' answer log and leaderboard are saved in a temporary folder
+(QUIZ_EVENT_DIR, QUIZ_LEADERBOARD_FILE), not in the app's real files, and
+deleted afterwards.
+
+Run it with:
+    python quiz_benchmark.py
+================================================================================
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+
+# Must be set before quiz_events and leaderboard are imported (by this file or the app)
+BENCHMARK_DIR = tempfile.mkdtemp(prefix="quiz-benchmark-")
+os.environ["QUIZ_EVENT_DIR"] = os.path.join(BENCHMARK_DIR, "events")
+os.environ["QUIZ_LEADERBOARD_FILE"] = os.path.join(BENCHMARK_DIR, "leaderboard.sqlite3")
+
+from streamlit.testing.v1 import AppTest
+
+from leaderboard import Leaderboard
+from question_bank import QuestionBank, QuestionCursor
+
+RUNS = 50
+SESSIONS = 200  # open quizzes on one server
+ANSWERED = 50
+
+TIMER_ONLY = """
+from quiz_timer import timer_box
+timer_box()
+"""
+
+
+def cpu_ms_per_run(app):
+    app.run()  # first run (imports, page setup) is not counted
+    start = time.process_time()
+    for _ in range(RUNS):
+        app.run()
+    return (time.process_time() - start) * 1000 / RUNS
+
+
+def full_page():
+    app = AppTest.from_file("math_quiz.py", default_timeout=30)
+    app.run()
+    for _ in range(ANSWERED):
+        app.number_input(key="answer_input").set_value(1)
+        app.main.button[0].click().run()  # Submit Answer
+    return app
+
+
+def timer_fragment():
+    app = AppTest.from_string(TIMER_ONLY, default_timeout=30)
+    app.session_state.start_time = time.time() - 300
+    app.session_state.correct_answers = ANSWERED // 2
+    return app
+
+
+def bank_timings(served=100_000):
+    start = time.perf_counter()
+    bank = QuestionBank("Hard", "Addition")
+    build_ms = (time.perf_counter() - start) * 1000
+
+    cursor = QuestionCursor(seed=1)
+    start = time.perf_counter()
+    for _ in range(served):
+        cursor.next_question("Hard", "Addition")
+    serve_us = (time.perf_counter() - start) * 1_000_000 / served
+    return len(bank), bank.nbytes, build_ms, serve_us
+
+
+def leaderboard_timings(sessions=1_000_000, queries=200):
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        board = Leaderboard(os.path.join(tmp, "leaderboard.sqlite3"))
+        start = time.perf_counter()
+        for i in range(sessions):
+            answered = rng.randint(10, 80)
+            board.record(f"player{i}", "Medium", "All", rng.randint(0, answered), answered, rng.uniform(20, 900))
+        record_us = (time.perf_counter() - start) * 1_000_000 / sessions  # the submit's share
+        board.flush()
+        write_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(queries):
+            board.top("Medium", "All")
+        top_ms = (time.perf_counter() - start) * 1000 / queries
+
+        start = time.perf_counter()
+        for _ in range(queries):
+            board.standing("Medium", "All", rng.uniform(0, 20))
+        rank_ms = (time.perf_counter() - start) * 1000 / queries
+        board.close()
+    return record_us, write_s, top_ms, rank_ms
+
+
+if __name__ == "__main__":
+    full_ms = cpu_ms_per_run(full_page())
+    timer_ms = cpu_ms_per_run(timer_fragment())
+    print(f"{'Per timer tick':<28} | {'CPU ms':>8} | {f'CPU s/s for {SESSIONS} quizzes':>26}")
+    print("-" * 70)
+    print(f"{'Whole page (before)':<28} | {full_ms:>8.1f} | {full_ms * SESSIONS / 1000:>26.2f}")
+    print(f"{'Timer fragment (now)':<28} | {timer_ms:>8.1f} | {timer_ms * SESSIONS / 1000:>26.2f}")
+    print(f"\nCPU per quiz per second drops by {(1 - timer_ms / full_ms) * 100:.0f}%")
+
+    size, nbytes, build_ms, serve_us = bank_timings()
+    print(f"\nQuestion bank: {size:,} questions ({nbytes / 1e6:.1f} MB) built in {build_ms:.0f} ms, "
+          f"{serve_us:.1f} µs per question served")
+
+    record_us, write_s, top_ms, rank_ms = leaderboard_timings()
+    print(f"\nLeaderboard: saving a score takes {record_us:.1f} µs (1,000,000 written in the background "
+          f"in {write_s:.0f} s); top 10 {top_ms:.2f} ms, rank/percentile {rank_ms:.2f} ms")
+    shutil.rmtree(BENCHMARK_DIR, ignore_errors=True)
@@ -0,0 +1,174 @@
+"""
+Event log of every answered question in math_quiz.py, for later analysis
+(see quiz_analytics.py).
+
+Each answer is one fixed-size binary record (EVENT_DTYPE, 34 bytes)
+appended to a file per day, events-YYYY-MM-DD.bin. Text fields are
+stored as codes: difficulty and operation are indexes into DIFFICULTIES
+and OPERATIONS in question_bank.py. A whole file loads straight into a
+NumPy array with np.fromfile, with no parsing, so millions of events load
+in well under a second.
+
+record() only adds the event to an in-memory buffer. A background thread
+appends the buffer to disk every FLUSH_SECONDS, so answering a question
+never waits for the disk. Events still in the buffer when the server
+stops are lost (at most FLUSH_SECONDS of answers). If the server stops in
+the middle of a write, the half-written record is cut off the next time
+that file is appended to, and skipped when it is loaded. If a write fails
+(disk full...), the events stay buffered and are tried again on the next
+flush; past MAX_BUFFERED the oldest are dropped, so memory stays bounded.
+Events that can't be stored at all (a value out of range for its field)
+are logged and dropped, so they can't block every later flush.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+from question_bank import DIFFICULTIES, OPERATIONS
+
+EVENT_DIR = os.getenv("QUIZ_EVENT_DIR", ".quiz_events")
+FLUSH_SECONDS = 1.0
+MAX_BUFFERED = 100_000  # events kept in memory while writes keep failing
+
+EVENT_DTYPE = np.dtype([
+    ("time", "<f8"),         # when the answer was given (Unix time)
+    ("session", "<i8"),      # one quiz run, from its start to a reset
+    ("difficulty", "i1"),    # index into DIFFICULTIES
+    ("operation", "i1"),     # index into OPERATIONS
+    ("num1", "<i2"),
+    ("num2", "<i2"),
+    ("answer", "<i2"),       # the right answer
+    ("user_answer", "<i4"),
+    ("correct", "?"),
+    ("time_ms", "<u4"),      # time taken to answer (0 when not timed)
+    ("timed", "?"),          # False if the answer time wasn't known
+])
+
+_INT32 = np.iinfo(np.int32)
+_UINT32 = np.iinfo(np.uint32)
+
+log = logging.getLogger(__name__)
+
+
+def event_path(log_dir, day):
+    return os.path.join(log_dir, f"events-{day.isoformat()}.bin")
+
+
+def load_event_file(path):
+    """All complete events in one file (a half-written last record is skipped)."""
+    count = os.path.getsize(path) // EVENT_DTYPE.itemsize
+    return np.fromfile(path, dtype=EVENT_DTYPE, count=count)
+
+
+def _to_array(events):
+    """The events as an EVENT_DTYPE array, leaving out (and logging) any that don't fit it."""
+    try:
+        return np.array(events, dtype=EVENT_DTYPE)
+    except (OverflowError, TypeError, ValueError):
+        pass
+    # Rare, so find the bad events one at a time
+    good = []
+    for event in events:
+        try:
+            np.array(event, dtype=EVENT_DTYPE)
+        except (OverflowError, TypeError, ValueError):
+            log.exception("Dropping a quiz event that could not be stored: %r", event)
+        else:
+            good.append(event)
+    return np.array(good, dtype=EVENT_DTYPE)
+
+
+class QuizEventLog:
+    """Buffered, append-only log of answered questions."""
+
+    def __init__(self, log_dir=EVENT_DIR, flush_seconds=FLUSH_SECONDS):
+        self.log_dir = log_dir
+        os.makedirs(log_dir, exist_ok=True)
+        self._buffer = []
+        self._lock = threading.Lock()        # guards _buffer
+        self._write_lock = threading.Lock()  # one flush at a time
+        self._open_path = None
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_loop, args=(flush_seconds,), name="quiz-events", daemon=True
+        )
+        self._flusher.start()
+
+    def record(self, session, question, user_answer, correct, time_ms):
+        """Buffer one answered question (a dict from question_bank.py); time_ms may be None."""
+        event = (
+            time.time(),
+            session,
+            DIFFICULTIES.index(question["difficulty"]),
+            OPERATIONS.index(question["operation"]),
+            question["num1"],
+            question["num2"],
+            question["answer"],
+            min(max(int(user_answer), _INT32.min), _INT32.max),
+            bool(correct),
+            min(max(int(time_ms), 0), _UINT32.max) if time_ms is not None else 0,
+            time_ms is not None,
+        )
+        with self._lock:
+            self._buffer.append(event)
+
+    def _flush_loop(self, flush_seconds):
+        while not self._stop.wait(flush_seconds):
+            try:
+                self.flush()
+            except Exception:
+                # The events are still buffered; keep the thread alive to try again
+                log.exception("Could not write the quiz event log")
+
+    def flush(self):
+        """Write everything buffered so far to disk.
+
+        If the write fails, the events go back into the buffer and the
+        error is raised. Events that don't fit EVENT_DTYPE are dropped (and
+        logged) instead, as retrying them would fail again.
+        """
+        with self._write_lock:
+            with self._lock:
+                events, self._buffer = self._buffer, []
+            if not events:
+                return 0
+            data = _to_array(events)
+            if not len(data):
+                return 0
+            path = event_path(self.log_dir, date.today())
+            try:
+                self._append(path, data)
+            except Exception:
+                self._open_path = None  # check the file's end again next time
+                with self._lock:
+                    self._buffer = (data.tolist() + self._buffer)[-MAX_BUFFERED:]
+                raise
+            return len(data)
+
+    def _append(self, path, data):
+        if path != self._open_path:
+            # First write to this file by this process: drop a record cut short by a crash
+            if os.path.exists(path):
+                size = os.path.getsize(path)
+                if size % EVENT_DTYPE.itemsize:
+                    os.truncate(path, size - size % EVENT_DTYPE.itemsize)
+            self._open_path = path
+        with open(path, "ab") as f:
+            start = f.tell()
+            try:
+                data.tofile(f)
+                f.flush()
+            except Exception:
+                # Take back a partly written batch, so the retry doesn't repeat events
+                f.truncate(start)
+                raise
+
+    def close(self):
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
@@ -0,0 +1,146 @@
+"""
+Answer statistics and question history for math_quiz.py.
+
+Everything here is updated in O(1) per answer and uses a fixed amount of
+memory, however long a student keeps playing:
+
+- RunningStats: count, mean and variance of answer times (Welford's
+  method), instead of keeping every time and summing the list again.
+- TimeHistogram: answer times counted in buckets that are 5% wider than
+  the one before, so p50/p90 can be read off within about 5%.
+- QuizStats: the above overall and per operation, plus correct counts.
+- HistoryRing: the last few answered questions in a fixed-size list that
+  wraps around, for the "Recent Questions" panel.
+"""
+
+import math
+
+HISTORY_SIZE = 10  # questions shown in "Recent Questions"
+
+# Histogram buckets: 0.1s and below in the first, 5% wider each step after that
+MIN_SECONDS = 0.1
+BUCKET_GROWTH = 1.05
+BUCKETS = 200  # the last bucket starts at about 0.1 * 1.05**199 = 1,650s
+
+
+class RunningStats:
+    """Count, mean and variance of a stream of numbers (Welford's method)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # sum of squared differences from the mean
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class TimeHistogram:
+    """Answer times in log-spaced buckets, for approximate percentiles."""
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.total = 0
+
+    @staticmethod
+    def bucket(seconds):
+        if seconds <= MIN_SECONDS:
+            return 0
+        return min(int(math.log(seconds / MIN_SECONDS, BUCKET_GROWTH)) + 1, BUCKETS - 1)
+
+    def add(self, seconds):
+        self.counts[self.bucket(seconds)] += 1
+        self.total += 1
+
+    def percentile(self, fraction):
+        """Approximate time below which `fraction` of the answers fall (None if empty)."""
+        if not self.total:
+            return None
+        rank = fraction * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index == 0:
+                    return MIN_SECONDS
+                # Middle of the bucket (on a log scale)
+                return MIN_SECONDS * BUCKET_GROWTH ** (index - 0.5)
+        return MIN_SECONDS * BUCKET_GROWTH ** (BUCKETS - 1)
+
+
+class OperationStats:
+    def __init__(self):
+        self.correct = 0
+        self.time = RunningStats()
+        self.histogram = TimeHistogram()
+
+    @property
+    def answered(self):
+        return self.time.count
+
+    @property
+    def accuracy(self):
+        return self.correct / self.answered * 100 if self.answered else 0.0
+
+    def add(self, correct, seconds):
+        self.correct += bool(correct)
+        self.time.add(seconds)
+        self.histogram.add(seconds)
+
+
+class QuizStats:
+    """Answer statistics for one quiz, overall and per operation."""
+
+    def __init__(self):
+        self.overall = OperationStats()
+        self.by_operation = {}
+
+    def record(self, operation, correct, seconds):
+        self.overall.add(correct, seconds)
+        self.by_operation.setdefault(operation, OperationStats()).add(correct, seconds)
+
+    @property
+    def avg_time(self):
+        return self.overall.time.mean
+
+    @property
+    def p50(self):
+        return self.overall.histogram.percentile(0.5)
+
+    @property
+    def p90(self):
+        return self.overall.histogram.percentile(0.9)
+
+
+class HistoryRing:
+    """The last `capacity` items; adding one more overwrites the oldest."""
+
+    def __init__(self, capacity=HISTORY_SIZE):
+        self._items = [None] * capacity
+        self._next = 0  # slot the next item goes into
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, item):
+        self._items[self._next] = item
+        self._next = (self._next + 1) % len(self._items)
+        self._count = min(self._count + 1, len(self._items))
+
+    def recent(self, limit=None):
+        """Items newest first (at most `limit`)."""
+        limit = self._count if limit is None else min(limit, self._count)
+        capacity = len(self._items)
+        return [self._items[(self._next - 1 - i) % capacity] for i in range(limit)]
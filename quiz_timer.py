@@ -0,0 +1,35 @@
+"""
+Elapsed-time box for math_quiz.py.
+
+The box refreshes itself once a second as a fragment: only this function
+re-runs on the timer, not the whole quiz page (styles, question, stats
+cards and history), which now re-runs only when the student does something.
+"""
+
+import time
+
+import streamlit as st
+
+from leaderboard import score_per_minute
+
+TIMER_SECONDS = 1  # how often the box refreshes
+
+
+@st.fragment(run_every=TIMER_SECONDS)
+def timer_box():
+    # Calculate elapsed time from start
+    elapsed_time = time.time() - st.session_state.start_time
+    minutes = int(elapsed_time // 60)
+    seconds = int(elapsed_time % 60)
+
+    # Over the time spent answering, the same figure the leaderboard saves
+    per_minute = score_per_minute(st.session_state.correct_answers, st.session_state.total_time)
+
+    # Display count-up timer with score per minute
+    timer_display = f"{minutes:02d}:{seconds:02d}"
+    st.markdown(f"""
+    <div class="timer-box">
+        ⏱️ Elapsed Time: {timer_display}
+        <div class="timer-info">Score/Minute: {per_minute:.2f}</div>
+    </div>
+    """, unsafe_allow_html=True)
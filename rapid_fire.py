@@ -0,0 +1,239 @@
+"""
+Rapid-fire answer mode for math_quiz.py.
+
+In the normal quiz every answer goes to the server and the whole page
+re-runs before the next question shows up. In rapid-fire mode a small
+component in the browser holds a queue of questions and checks answers
+itself, so the next question appears as soon as Enter is pressed:
+
+- The server sends questions with a hash of each answer (not the answer),
+  salted per round, so the browser can tell right from wrong. (With
+  answers this small the hash only keeps answers from being read straight
+  off the page; the server re-checks every answer anyway.)
+- The browser sends its results back every SYNC_EVERY answers (and when it
+  runs out of questions or the student pauses). It re-sends anything the
+  server has not acknowledged, and the server ignores questions it has
+  already scored, so a lost or repeated sync costs nothing.
+- When fewer than REFILL_BELOW questions are left, the next batch is sent
+  along with the acknowledgement, so the queue never runs dry while the
+  student is typing.
+"""
+
+import math
+import secrets
+import time
+
+import streamlit as st
+
+BATCH_SIZE = 20    # questions sent per batch
+REFILL_BELOW = 10  # send another batch when fewer questions than this are left
+SYNC_EVERY = 5     # answers per sync back to the server
+IDLE_SYNC_MS = 2000  # also sync when the student stops typing for this long
+
+HTML = """
+<div class="rapid-fire">
+    <div class="rf-status"><span class="rf-score"></span><span class="rf-left"></span></div>
+    <div class="rf-question"></div>
+    <input class="rf-input" inputmode="numeric" autocomplete="off" placeholder="Type the answer and press Enter">
+    <div class="rf-feedback">&nbsp;</div>
+</div>
+"""
+
+CSS = """
+.rapid-fire {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 2rem;
+    border-radius: 1.5rem;
+    text-align: center;
+    font-family: sans-serif;
+}
+.rf-status {
+    display: flex;
+    justify-content: space-between;
+    opacity: 0.9;
+}
+.rf-question {
+    font-size: 3rem;
+    font-weight: bold;
+    margin: 1.5rem 0;
+}
+.rf-input {
+    font-size: 2rem;
+    width: 12rem;
+    text-align: center;
+    border-radius: 0.5rem;
+    border: none;
+    padding: 0.5rem;
+}
+.rf-feedback {
+    font-size: 1.5rem;
+    margin-top: 1rem;
+    min-height: 2rem;
+}
+"""
+
+JS = """
+// One entry per round, kept across re-renders of the component
+const rounds = (window.__mathRapidFire = window.__mathRapidFire || {});
+
+function answerHash(salt, n, answer) {
+    // FNV-1a (32 bit), the same as answer_hash() in rapid_fire.py
+    const text = `${salt}:${n}:${answer}`;
+    let h = 0x811c9dc5;
+    for (let i = 0; i < text.length; i++) {
+        h ^= text.charCodeAt(i);
+        h = Math.imul(h, 0x01000193) >>> 0;
+    }
+    return h;
+}
+
+export default function (component) {
+    const { data, parentElement, setTriggerValue } = component;
+    if (!data || !data.session) return;
+
+    let round = rounds[data.session];
+    if (!round) {
+        round = rounds[data.session] = { queue: [], known: 0, outbox: [], shownAt: 0, score: 0, answered: 0, timer: null };
+    }
+    // New questions join the queue; answers the server has acknowledged leave the outbox
+    for (const q of data.questions) {
+        if (q.n > round.known) {
+            round.queue.push(q);
+            round.known = q.n;
+        }
+    }
+    round.outbox = round.outbox.filter((a) => a.n > data.acked);
+
+    const questionEl = parentElement.querySelector(".rf-question");
+    const input = parentElement.querySelector(".rf-input");
+    const feedback = parentElement.querySelector(".rf-feedback");
+    const scoreEl = parentElement.querySelector(".rf-score");
+    const leftEl = parentElement.querySelector(".rf-left");
+
+    function send() {
+        clearTimeout(round.timer);
+        if (round.outbox.length) {
+            setTriggerValue("results", { session: data.session, answers: round.outbox });
+        }
+    }
+
+    function show() {
+        scoreEl.textContent = `✅ ${round.score} / ${round.answered}`;
+        leftEl.textContent = `${round.queue.length} ready`;
+        if (!round.queue.length) {
+            questionEl.textContent = "Loading more questions…";
+            input.disabled = true;
+            return;
+        }
+        const q = round.queue[0];
+        if (round.shownFor !== q.n) {
+            round.shownFor = q.n;
+            round.shownAt = performance.now();
+        }
+        questionEl.textContent = q.q;
+        input.disabled = false;
+        input.focus();
+    }
+
+    input.onkeydown = (event) => {
+        if (event.key !== "Enter" || !round.queue.length) return;
+        const value = input.value.trim();
+        if (!/^-?\\d+$/.test(value)) return;
+        const answer = parseInt(value, 10);
+        const q = round.queue.shift();
+        const correct = answerHash(data.salt, q.n, answer) === q.h;
+        round.answered += 1;
+        round.score += correct ? 1 : 0;
+        round.outbox.push({ n: q.n, a: answer, ms: Math.round(performance.now() - round.shownAt) });
+        feedback.textContent = correct ? "✅" : "❌";
+        input.value = "";
+        show();
+
+        if (round.outbox.length >= data.syncEvery || !round.queue.length) {
+            send();
+        } else {
+            clearTimeout(round.timer);
+            round.timer = setTimeout(send, data.idleSyncMs);
+        }
+    };
+
+    show();
+    return () => {
+        input.onkeydown = null;
+    };
+}
+"""
+
+
+def answer_hash(salt, n, answer):
+    """FNV-1a (32 bit) of "salt:n:answer" - must match answerHash() in the JS above."""
+    h = 0x811c9dc5
+    for byte in f"{salt}:{n}:{answer}".encode("ascii"):
+        h ^= byte
+        h = (h * 0x01000193) & 0xffffffff
+    return h
+
+
+class RapidFireRound:
+    """Server side of one rapid-fire round: the questions sent out and not yet answered."""
+
+    def __init__(self, difficulty, operation):
+        self.difficulty = difficulty
+        self.operation = operation  # None means all operations
+        self.session = secrets.token_hex(8)
+        self.salt = secrets.token_hex(4)
+        self.outstanding = {}  # question number -> (question, time it was sent)
+        self.next_n = 1
+        self.acked = 0  # highest question number scored so far
+
+    def top_up(self, cursor):
+        """Add a batch of questions if the browser is running low."""
+        if len(self.outstanding) >= REFILL_BELOW:
+            return
+        for _ in range(BATCH_SIZE):
+            self.outstanding[self.next_n] = (cursor.next_question(self.difficulty, self.operation), time.time())
+            self.next_n += 1
+
+    def data(self):
+        """What the browser component gets: the questions with hashed answers."""
+        return {
+            "session": self.session,
+            "salt": self.salt,
+            "questions": [
+                {"n": n, "q": f"{q['symbol']} {q['question']}", "h": answer_hash(self.salt, n, q["answer"])}
+                for n, (q, _) in self.outstanding.items()
+            ],
+            "acked": self.acked,
+            "syncEvery": SYNC_EVERY,
+            "idleSyncMs": IDLE_SYNC_MS,
+        }
+
+    def accept(self, payload):
+        """Score a sync from the browser; returns [(question, user answer, seconds taken)] for new answers."""
+        if not isinstance(payload, dict) or payload.get("session") != self.session:
+            return []
+        now = time.time()
+        results = []
+        for item in payload.get("answers") or []:
+            try:
+                n, answer, ms = int(item["n"]), int(item["a"]), float(item["ms"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            sent = self.outstanding.pop(n, None)
+            if sent is None:
+                continue  # already scored (a repeated sync) or never sent
+            question, sent_at = sent
+            self.acked = max(self.acked, n)
+            # The browser's time can't be more than the time since the question was sent
+            elapsed = now - sent_at
+            seconds = min(max(ms, 0.0) / 1000, elapsed) if math.isfinite(ms) else elapsed
+            results.append((question, answer, seconds))
+        return results
+
+
+def rapid_fire(round_, on_results, key="rapid_fire"):
+    """Show the rapid-fire component for a round; on_results runs when the browser syncs."""
+    # Registering again each run is cheap, and keeps working if the server's runtime is replaced
+    component = st.components.v2.component("math_rapid_fire", html=HTML, css=CSS, js=JS)
+    return component(key=key, data=round_.data(), on_results_change=on_results)
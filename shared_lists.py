@@ -0,0 +1,159 @@
+"""
+Named to-do lists shared by every browser session of todo_app.py.
+
+Each list is one TaskStore, saved with task_journal.py and held once per
+server process, so every session works on the same tasks. On top of the
+store, a list keeps:
+
+- version: a number that goes up by one for every change
+- a change log of the last LOG_LIMIT changes, as (version, record, author)
+- the version of the last change to each task
+
+A session remembers the version it last saw and asks for the changes after
+it (changes_since), so keeping up costs the size of the changes, not the
+size of the list. Complete and delete are checked against that version
+(optimistic locking): if another session changed the task in the meantime,
+VersionConflict is raised instead of acting on a stale screen. Clear is
+checked the same way against any change to the list.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+
+from task_journal import DATA_DIR, open_store
+
+DEFAULT_LIST = "My Tasks"
+LOG_LIMIT = 10_000  # changes kept for sessions that are catching up
+
+LISTS_FILE = "lists.json"
+
+_PAST_TENSE = {"add": "added", "complete": "completed", "delete": "deleted", "clear": "cleared"}
+
+
+class VersionConflict(Exception):
+    """The task was changed by another session since this session last looked."""
+
+
+def list_dir(data_dir, name):
+    # The default list stays where the single saved list was kept before
+    # named lists existed, so the tasks saved there are still found
+    if name == DEFAULT_LIST:
+        return data_dir
+    # Names can be anything (including Chinese), so the folder is named after a hash
+    return os.path.join(data_dir, hashlib.sha1(name.encode("utf-8")).hexdigest()[:16])
+
+
+class SharedTaskList:
+    """One named list: a TaskStore plus a versioned change log.
+
+    All changes should go through this class (not straight to the store),
+    so the version checks and the change log see every one of them.
+    """
+
+    def __init__(self, name, store):
+        self.name = name
+        self.store = store
+        self.version = 0
+        self._log = deque(maxlen=LOG_LIMIT)
+        self._task_versions = {}  # task ID -> (version, op) of its last change
+        self._author = None
+        self._lock = threading.RLock()
+        store.subscribe(self._on_change)
+
+    def _on_change(self, records):
+        # Called by the store inside a change, while self._lock is held
+        for record in records:
+            self.version += 1
+            self._log.append((self.version, record, self._author))
+            if record["op"] == "clear":
+                self._task_versions.clear()
+            else:
+                self._task_versions[record["id"]] = (self.version, record["op"])
+
+    def changes_since(self, version):
+        """Changes after `version`, oldest first, or None if they are no longer in the log."""
+        with self._lock:
+            if version >= self.version:
+                return []
+            if not self._log or self._log[0][0] > version + 1:
+                return None
+            # The log holds consecutive versions, so the start position is known
+            start = version + 1 - self._log[0][0]
+            return [self._log[i] for i in range(start, len(self._log))]
+
+    def _check(self, task_id, seen_version):
+        changed = self._task_versions.get(task_id)
+        if changed and changed[0] > seen_version:
+            raise VersionConflict(f"Another session already {_PAST_TENSE[changed[1]]} this task.")
+        if self.store.get(task_id) is None:
+            raise VersionConflict("This task no longer exists.")
+
+    def _change(self, author, method, *args, **kwargs):
+        with self._lock:
+            self._author = author
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._author = None
+
+    def add(self, task, priority, due=None, author=None):
+        return self._change(author, self.store.add, task, priority, due=due)
+
+    def add_many(self, rows, author=None):
+        return self._change(author, self.store.add_many, rows)
+
+    def complete(self, task_id, seen_version, author=None):
+        with self._lock:
+            self._check(task_id, seen_version)
+            return self._change(author, self.store.complete, task_id)
+
+    def delete(self, task_id, seen_version, author=None):
+        with self._lock:
+            self._check(task_id, seen_version)
+            return self._change(author, self.store.delete, task_id)
+
+    def clear(self, seen_version, author=None):
+        with self._lock:
+            if self.version > seen_version:
+                raise VersionConflict("The list changed since you last looked; check it and clear again.")
+            return self._change(author, self.store.clear)
+
+
+class SharedLists:
+    """All named lists, opened from disk the first time each one is used."""
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self._lists = {}
+        self._lock = threading.Lock()
+        os.makedirs(data_dir, exist_ok=True)
+        path = os.path.join(data_dir, LISTS_FILE)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._names = json.load(f)
+        else:
+            self._names = [DEFAULT_LIST]
+
+    def names(self):
+        with self._lock:
+            return list(self._names)
+
+    def create(self, name):
+        with self._lock:
+            if name not in self._names:
+                self._names.append(name)
+                path = os.path.join(self.data_dir, LISTS_FILE)
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(self._names, f, ensure_ascii=False)
+                os.replace(path + ".tmp", path)
+
+    def get(self, name):
+        with self._lock:
+            shared = self._lists.get(name)
+            if shared is None:
+                store = open_store(list_dir(self.data_dir, name))
+                shared = self._lists[name] = SharedTaskList(name, store)
+            return shared
@@ -0,0 +1,166 @@
+"""
+Bulk import and export of tasks for todo_app.py (CSV or JSONL).
+
+Import reads the uploaded file one row at a time, checks each row and adds
+the good ones to the store in batches of IMPORT_BATCH, so a file with tens
+of thousands of tasks never has to be held in memory as a list. Columns:
+
+- task (required)
+- priority (required, one of the app's priority levels, any capitalisation)
+- created_at (optional, "YYYY-MM-DD HH:MM" or ISO format; defaults to now)
+- due (optional, "YYYY-MM-DD")
+- completed_at (optional; if set, the task is imported as completed)
+
+Other columns are ignored, so an exported file can be imported again.
+
+Export writes the tasks to a temporary file one row at a time and hands
+that file over, instead of building one big string.
+"""
+
+import csv
+import io
+import json
+import tempfile
+from datetime import datetime
+
+IMPORT_BATCH = 1000    # rows added to the store at a time
+MAX_ERRORS_SHOWN = 20  # rows with problems that are reported back in detail
+
+EXPORT_FIELDS = ["task", "priority", "created_at", "due", "status", "completed_at"]
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def file_format(file_name):
+    return "jsonl" if file_name.lower().endswith((".jsonl", ".json", ".ndjson")) else "csv"
+
+
+def iter_rows(binary_file, fmt):
+    """Yield (line number, row dict) from an uploaded file without reading it all at once."""
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    yield line_number, None
+                    continue
+                yield line_number, row if isinstance(row, dict) else None
+    finally:
+        # Leave the uploaded file open for Streamlit
+        text.detach()
+
+
+def parse_time(value, field):
+    value = str(value or "").strip()
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, TIME_FORMAT).strftime(TIME_FORMAT)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).strftime(TIME_FORMAT)
+    except ValueError:
+        raise ValueError(f"{field} '{value}' is not a date like 2024-05-01 09:30") from None
+
+
+def parse_date(value, field):
+    value = str(value or "").strip()
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).date().isoformat()
+    except ValueError:
+        raise ValueError(f"{field} '{value}' is not a date like 2024-05-01") from None
+
+
+def validate_row(row, priorities):
+    """Return (task, priority, created_at, due, completed_at) for a good row, or raise ValueError."""
+    if row is None:
+        raise ValueError("not a valid JSON object")
+    task = str(row.get("task") or "").strip()
+    if not task:
+        raise ValueError("task is empty")
+    priority_text = str(row.get("priority") or "").strip()
+    # "high", "High" and "High 🔴" all mean High
+    priority = priorities.get(priority_text.split()[0].lower()) if priority_text else None
+    if priority is None:
+        raise ValueError(f"priority '{priority_text}' is not one of {', '.join(priorities.values())}")
+    return (
+        task,
+        priority,
+        parse_time(row.get("created_at"), "created_at"),
+        parse_date(row.get("due"), "due"),
+        parse_time(row.get("completed_at"), "completed_at"),
+    )
+
+
+def import_tasks(store, binary_file, fmt, priority_levels, on_progress=None, author=None):
+    """Add every good row of the file to the store.
+
+    store can also be a SharedTaskList, and then author (if given) is
+    recorded as the one who added the tasks. on_progress(fraction) is
+    called after each batch. Returns
+    (tasks imported, rows skipped, [(line number, problem), ...]) with at
+    most MAX_ERRORS_SHOWN problems listed.
+    """
+    priorities = {level.lower(): level for level in priority_levels}
+    total_bytes = max(getattr(binary_file, "size", 0) or 0, 1)
+    imported = skipped = 0
+    errors = []
+    batch = []
+    add_options = {"author": author} if author is not None else {}
+
+    def flush():
+        nonlocal imported
+        imported += store.add_many(batch, **add_options)
+        batch.clear()
+        if on_progress:
+            on_progress(min(binary_file.tell() / total_bytes, 1.0))
+
+    for line_number, row in iter_rows(binary_file, fmt):
+        try:
+            batch.append(validate_row(row, priorities))
+        except ValueError as e:
+            skipped += 1
+            if len(errors) < MAX_ERRORS_SHOWN:
+                errors.append((line_number, str(e)))
+            continue
+        if len(batch) >= IMPORT_BATCH:
+            flush()
+    flush()
+    return imported, skipped, errors
+
+
+def export_rows(store):
+    """Every task as an export row: pending tasks first, then completed ones."""
+    for todo in list(store.pending_tasks()):
+        yield {"task": todo["task"], "priority": todo["priority"], "created_at": todo["created_at"],
+               "due": todo.get("due") or "", "status": "pending", "completed_at": ""}
+    for todo in list(store.completed.values()):
+        yield {"task": todo["task"], "priority": todo["priority"], "created_at": todo["created_at"],
+               "due": todo.get("due") or "", "status": "completed", "completed_at": todo.get("completed_at", "")}
+
+
+def export_file(store, fmt):
+    """Write all tasks to a temporary file (deleted when closed) and return it, rewound."""
+    out = tempfile.TemporaryFile()
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    if fmt == "csv":
+        writer = csv.DictWriter(text, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(export_rows(store))
+    else:
+        for row in export_rows(store):
+            text.write(json.dumps(row, ensure_ascii=False) + "\n")
+    text.flush()
+    text.detach()
+    out.seek(0)
+    return out
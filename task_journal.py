@@ -0,0 +1,184 @@
+"""
+Durable storage for todo_app.py: a snapshot plus an append-only journal.
+
+Saving the whole task list on every click gets slower as the list grows.
+Instead, every change record from TaskStore (see task_store.py) is appended
+to a journal file as one JSON line, so a click writes a few dozen bytes
+however many tasks there are.
+
+Files in DATA_DIR:
+- snapshot.json: the whole store, plus the number of the first journal
+  that is NOT already included in it
+- journal-000001.jsonl, journal-000002.jsonl, ...: changes, oldest first
+
+Starting up loads the snapshot and replays the journals it does not cover.
+Once the current journal holds COMPACT_AFTER records, new changes move to
+the next journal straight away and a background thread folds the finished
+journals into a new snapshot (written to a temp file and swapped in, so a
+crash never leaves half a snapshot). Startup time therefore depends on the
+number of tasks, not on how many changes were ever made.
+
+There is one saved list per folder, and the server opens it once, so every
+visitor of the app works on the same tasks (see shared_lists.py for how
+sessions keep up with each other's changes).
+"""
+
+import json
+import os
+import re
+import threading
+
+from task_store import TaskStore
+
+DATA_DIR = os.getenv("TODO_DATA_DIR", ".todo_data")
+COMPACT_AFTER = 1000  # journal records before a compaction starts
+
+SNAPSHOT_FILE = "snapshot.json"
+_JOURNAL_NAME = re.compile(r"^journal-(\d+)\.jsonl$")
+
+
+def read_snapshot(data_dir):
+    """Return (store, generation) from the snapshot, or an empty store if there is none."""
+    path = os.path.join(data_dir, SNAPSHOT_FILE)
+    if not os.path.exists(path):
+        return TaskStore(), 1
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return TaskStore.from_snapshot(data["store"]), data["generation"]
+
+
+def write_snapshot(data_dir, store, generation):
+    path = os.path.join(data_dir, SNAPSHOT_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"generation": generation, "store": store.snapshot()}, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def replay(store, path):
+    """Apply every record in a journal file to store.
+
+    Returns (records applied, byte offset after the last complete line). A
+    crash in the middle of a write can leave a half-written last line; it
+    is skipped, and the offset lets the caller cut it off. A complete line
+    that can't be read (corrupted on disk) is skipped on its own, so the
+    records after it still count.
+    """
+    count = 0
+    good_offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            good_offset += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            store.apply(record)
+            count += 1
+    return count, good_offset
+
+
+class TaskJournal:
+    """Keeps a TaskStore on disk as a snapshot plus an append-only journal."""
+
+    def __init__(self, data_dir=DATA_DIR, compact_after=COMPACT_AFTER, fsync=False):
+        self.data_dir = data_dir
+        self.compact_after = compact_after
+        self.fsync = fsync  # also wait for the disk on every change (slower, survives power loss)
+        self.generation = None
+        self.records = 0  # records in the current journal
+        self._file = None
+        self._lock = threading.Lock()
+        self._compacting = None
+        os.makedirs(data_dir, exist_ok=True)
+
+    def journal_path(self, generation):
+        return os.path.join(self.data_dir, f"journal-{generation:06d}.jsonl")
+
+    def journal_generations(self):
+        generations = []
+        for name in os.listdir(self.data_dir):
+            match = _JOURNAL_NAME.match(name)
+            if match:
+                generations.append(int(match.group(1)))
+        return sorted(generations)
+
+    def load(self):
+        """Rebuild the store from disk and start journaling its changes."""
+        store, first = read_snapshot(self.data_dir)
+        generation = first
+        records = 0
+        for gen in self.journal_generations():
+            path = self.journal_path(gen)
+            if gen < first:
+                # Already in the snapshot (a compaction stopped before cleaning up)
+                os.remove(path)
+                continue
+            records, good_offset = replay(store, path)
+            if good_offset < os.path.getsize(path):
+                with open(path, "r+b") as f:
+                    f.truncate(good_offset)
+            generation = gen
+
+        self.generation = generation
+        self.records = records
+        self._file = open(self.journal_path(generation), "ab")
+        store.listeners.append(self.append)
+        if records >= self.compact_after:
+            self.compact()
+        return store
+
+    def append(self, records):
+        data = b"".join(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n" for record in records)
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.records += len(records)
+            start_compaction = self.records >= self.compact_after
+        if start_compaction:
+            self.compact()
+
+    def compact(self):
+        """Switch to a new journal and fold the old ones into the snapshot in the background."""
+        with self._lock:
+            if self._compacting is not None and self._compacting.is_alive():
+                return
+            self._file.close()
+            self.generation += 1
+            self.records = 0
+            self._file = open(self.journal_path(self.generation), "ab")
+            self._compacting = threading.Thread(
+                target=self._write_snapshot, args=(self.generation,), name="todo-compact", daemon=True
+            )
+            self._compacting.start()
+
+    def _write_snapshot(self, upto):
+        # Works from the files only, so the live store is never locked or copied
+        store, first = read_snapshot(self.data_dir)
+        finished = [gen for gen in self.journal_generations() if first <= gen < upto]
+        for gen in finished:
+            replay(store, self.journal_path(gen))
+        write_snapshot(self.data_dir, store, upto)
+        for gen in finished:
+            os.remove(self.journal_path(gen))
+
+    def wait(self):
+        """Block until a running compaction has finished."""
+        if self._compacting is not None:
+            self._compacting.join()
+
+    def close(self):
+        self.wait()
+        with self._lock:
+            self._file.close()
+
+
+def open_store(data_dir=DATA_DIR, **kwargs):
+    """Load the saved tasks; every later change to the returned store is saved too."""
+    return TaskJournal(data_dir, **kwargs).load()
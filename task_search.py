@@ -0,0 +1,151 @@
+"""
+Search over all tasks (pending and completed) for todo_app.py.
+
+An inverted index maps every token to the IDs of the tasks that contain it.
+Tokens come from the task text, the priority and the dates (created, due,
+completed), so "milk", "high" and "2024-05" are all valid searches.
+Chinese characters are indexed one per token, so any part of a Chinese
+task name can be found.
+
+Every search term of two or more characters is a prefix ("mil" finds
+"milk", "2024-05" finds every date in May 2024); a single character only
+matches itself, otherwise "a" would pull in most of the list. All terms
+must match. The distinct tokens are kept in
+a sorted list, so the tokens starting with a prefix are one bisect away.
+
+The index is built once per store and then kept up to date from the
+store's change records (see task_store.py), never by rescanning the tasks.
+"""
+
+import re
+import threading
+import weakref
+from bisect import bisect_left, insort
+
+MIN_PREFIX = 2  # shorter search terms must match a whole token
+
+_TOKEN = re.compile(r"\d{4}-\d{2}-\d{2}|\d{4}-\d{2}|[\u2e80-\u9fff\uf900-\ufaff]|\w+")
+
+
+def tokenize(text):
+    return _TOKEN.findall((text or "").lower())
+
+
+def task_tokens(todo):
+    tokens = set(tokenize(todo["task"]))
+    tokens.add(todo["priority"].lower())
+    for field in ("created_at", "due", "completed_at"):
+        if todo.get(field):
+            tokens.add(todo[field][:10])  # the date, not the time
+    return tokens
+
+
+class TaskSearchIndex:
+    """Token -> task ID index over one TaskStore, updated as the store changes."""
+
+    def __init__(self, store):
+        self._store = weakref.ref(store)  # the store holds this index (as a listener), not the other way round
+        self._postings = {}    # token -> set of task IDs
+        self._doc_tokens = {}  # task ID -> its tokens (needed to remove it again)
+        self._tokens = []      # every token in _postings, sorted
+        self._max_id = 0
+        self._lock = threading.Lock()
+        with self._lock:
+            # Changes made while this runs wait for the lock, then apply on top
+            for todo in store.subscribe(self.update):
+                self._add(todo["id"], task_tokens(todo))
+
+    def __len__(self):
+        return len(self._doc_tokens)
+
+    def _add(self, task_id, tokens):
+        self._doc_tokens[task_id] = tokens
+        self._max_id = max(self._max_id, task_id)
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                self._postings[token] = ids = set()
+                insort(self._tokens, token)
+            ids.add(task_id)
+
+    def _remove(self, task_id):
+        for token in self._doc_tokens.pop(task_id, ()):
+            ids = self._postings[token]
+            ids.discard(task_id)
+            if not ids:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+
+    def update(self, records):
+        """Store listener: apply a batch of change records to the index."""
+        with self._lock:
+            for record in records:
+                op = record["op"]
+                if op == "add":
+                    self._add(record["id"], task_tokens(record))
+                elif op == "complete":
+                    if record["id"] in self._doc_tokens:
+                        tokens = self._doc_tokens.pop(record["id"])
+                        self._add(record["id"], tokens | {record["completed_at"][:10]})
+                elif op == "delete":
+                    self._remove(record["id"])
+                elif op == "clear":
+                    self._postings.clear()
+                    self._doc_tokens.clear()
+                    self._tokens.clear()
+
+    def _prefix_tokens(self, prefix):
+        if len(prefix) < MIN_PREFIX:
+            return [prefix] if prefix in self._postings else []
+        start = bisect_left(self._tokens, prefix)
+        end = bisect_left(self._tokens, prefix + "\U0010ffff", start)
+        return self._tokens[start:end]
+
+    def _newest(self, ids, limit):
+        if len(ids) * 4 < self._max_id:
+            return sorted(ids, reverse=True)[:limit]
+        # Most IDs match: walking down from the newest finds `limit` of them almost at once
+        top = []
+        for task_id in range(self._max_id, 0, -1):
+            if task_id in ids:
+                top.append(task_id)
+                if len(top) == limit:
+                    break
+        return top
+
+    def search(self, query, limit=20):
+        """Return (tasks, total matches) for a query; tasks are the newest `limit` matches."""
+        terms = set(tokenize(query))
+        if not terms:
+            return [], 0
+        with self._lock:
+            expanded = sorted((self._prefix_tokens(term) for term in terms), key=len)
+            if not expanded[0]:
+                return [], 0
+            matches = set().union(*(self._postings[token] for token in expanded[0]))
+            for tokens in expanded[1:]:
+                if not matches:
+                    break
+                if len(matches) < len(tokens):
+                    # Fewer candidates than tokens to merge: check the candidates instead
+                    wanted = set(tokens)
+                    matches = {task_id for task_id in matches if not self._doc_tokens[task_id].isdisjoint(wanted)}
+                else:
+                    matches &= set().union(*(self._postings[token] for token in tokens))
+            top = self._newest(matches, limit)
+        store = self._store()
+        tasks = [todo for todo in map(store.get, top) if todo is not None] if store else []
+        return tasks, len(matches)
+
+
+_indexes = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(store):
+    """The search index for a store, built the first time it is asked for."""
+    with _indexes_lock:
+        index = _indexes.get(store)
+        if index is None:
+            index = _indexes[store] = TaskSearchIndex(store)
+        return index
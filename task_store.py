@@ -0,0 +1,266 @@
+"""
+Task storage for todo_app.py.
+
+Tasks are kept in dicts keyed by a task ID that only ever goes up, so IDs
+are never reused after a delete (which used to give duplicate widget keys).
+Python dicts remember insertion order, so:
+
+- pending: tasks in the order they were added
+- completed: tasks in the order they were completed
+
+Completing or deleting a task is a dict lookup instead of a list scan.
+
+Pending tasks are also kept in two sorted lists of keys, updated with
+bisect on every change instead of re-sorting:
+
+- by_priority: (priority rank, due date, id) - High first, then the
+  earliest due date; gives "Next up" and the sorted-by-priority pages
+- by_due: (due date, priority rank, id) for tasks that have a due date;
+  overdue tasks are the front of this list, found with one bisect
+
+So those views read only the tasks they show.
+
+Every change is described as a small record ({"op": "add", ...}) and
+applied with apply(). The same records can be saved and replayed later to
+rebuild the store: add(), add_many(), complete(), delete() and clear()
+pass their records to the store's listeners (see task_journal.py), while
+apply() on its own - used when replaying - does not.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from datetime import date, datetime
+from itertools import islice
+
+
+PRIORITY_ORDER = ["High", "Medium", "Low"]
+_PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITY_ORDER)}
+NO_DUE_DATE = "9999-12-31"  # sorts after every real due date
+
+
+def now_text():
+    return datetime.now().strftime("%Y-%m-%d %H:%M")
+
+
+def today_text():
+    return date.today().isoformat()
+
+
+def priority_key(todo):
+    return (_PRIORITY_RANK.get(todo["priority"], len(PRIORITY_ORDER)), todo.get("due") or NO_DUE_DATE, todo["id"])
+
+
+def due_key(todo):
+    return (todo["due"], _PRIORITY_RANK.get(todo["priority"], len(PRIORITY_ORDER)), todo["id"])
+
+
+def _remove_key(keys, key):
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
+
+
+class TaskStore:
+    def __init__(self):
+        self.pending = {}
+        self.completed = {}
+        self.next_id = 1
+        self.by_priority = []
+        self.by_due = []
+        self.listeners = []
+        self._lock = threading.RLock()  # the saved store is shared by every session
+
+    # Counters (dict sizes are kept by Python, so these are O(1))
+    @property
+    def pending_count(self):
+        return len(self.pending)
+
+    @property
+    def completed_count(self):
+        return len(self.completed)
+
+    @property
+    def total_count(self):
+        return len(self.pending) + len(self.completed)
+
+    def get(self, task_id):
+        return self.pending.get(task_id) or self.completed.get(task_id)
+
+    # Changes
+    def add(self, task, priority, created_at=None, due=None):
+        """Add a new pending task and return it. due is an optional "YYYY-MM-DD" date."""
+        with self._lock:
+            record = {
+                "op": "add",
+                "id": self.next_id,
+                "task": task,
+                "priority": priority,
+                "created_at": created_at or now_text(),
+                "due": due,
+            }
+            return self._record(record)
+
+    def complete(self, task_id):
+        with self._lock:
+            if task_id not in self.pending:
+                return None
+            return self._record({"op": "complete", "id": task_id, "completed_at": now_text()})
+
+    def delete(self, task_id):
+        with self._lock:
+            if task_id not in self.pending and task_id not in self.completed:
+                return None
+            return self._record({"op": "delete", "id": task_id})
+
+    def clear(self):
+        return self._record({"op": "clear"})
+
+    def subscribe(self, listener):
+        """Add a listener and return every current task, in one step.
+
+        Anything built from the returned tasks and then kept up to date by
+        the listener misses no change and sees none twice.
+        """
+        with self._lock:
+            self.listeners.append(listener)
+            return list(self.pending.values()) + list(self.completed.values())
+
+    def add_many(self, rows):
+        """Add many tasks at once and return how many were added.
+
+        rows holds (task, priority, created_at, due, completed_at) tuples; a row
+        with a completed_at is added as already completed. The listeners get
+        the whole batch in one call.
+        """
+        records = []
+        with self._lock:
+            for task, priority, created_at, due, completed_at in rows:
+                record = {
+                    "op": "add",
+                    "id": self.next_id,
+                    "task": task,
+                    "priority": priority,
+                    "created_at": created_at or now_text(),
+                    "due": due,
+                }
+                self.apply(record)
+                records.append(record)
+                if completed_at:
+                    record = {"op": "complete", "id": record["id"], "completed_at": completed_at}
+                    self.apply(record)
+                    records.append(record)
+            for listener in self.listeners:
+                listener(records)
+        return sum(1 for record in records if record["op"] == "add")
+
+    def _record(self, record):
+        with self._lock:
+            result = self.apply(record)
+            for listener in self.listeners:
+                listener([record])
+            return result
+
+    def apply(self, record):
+        """Apply one change record and return the task it touched (if any)."""
+        op = record["op"]
+        if op == "add":
+            todo = {
+                "id": record["id"],
+                "task": record["task"],
+                "priority": record["priority"],
+                "created_at": record["created_at"],
+                "due": record.get("due"),
+            }
+            self.pending[todo["id"]] = todo
+            self._index(todo)
+            self.next_id = max(self.next_id, todo["id"] + 1)
+            return todo
+        if op == "complete":
+            todo = self.pending.pop(record["id"], None)
+            if todo is not None:
+                self._unindex(todo)
+                todo["completed_at"] = record["completed_at"]
+                self.completed[todo["id"]] = todo
+            return todo
+        if op == "delete":
+            todo = self.pending.pop(record["id"], None)
+            if todo is not None:
+                self._unindex(todo)
+                return todo
+            return self.completed.pop(record["id"], None)
+        if op == "clear":
+            self.pending.clear()
+            self.completed.clear()
+            self.by_priority.clear()
+            self.by_due.clear()
+            return None
+        raise ValueError(f"Unknown task operation: {op}")
+
+    def _index(self, todo):
+        insort(self.by_priority, priority_key(todo))
+        if todo["due"]:
+            insort(self.by_due, due_key(todo))
+
+    def _unindex(self, todo):
+        _remove_key(self.by_priority, priority_key(todo))
+        if todo["due"]:
+            _remove_key(self.by_due, due_key(todo))
+
+    # Saving and loading the whole store
+    def snapshot(self):
+        """Plain-data copy of the store (lists keep the pending/completed order)."""
+        return {
+            "next_id": self.next_id,
+            "pending": list(self.pending.values()),
+            "completed": list(self.completed.values()),
+        }
+
+    @classmethod
+    def from_snapshot(cls, data):
+        store = cls()
+        store.next_id = data.get("next_id", 1)
+        store.pending = {todo["id"]: todo for todo in data.get("pending", [])}
+        store.completed = {todo["id"]: todo for todo in data.get("completed", [])}
+        for todo in store.pending.values():
+            todo.setdefault("due", None)
+        # One sort here instead of one insert per task
+        store.by_priority = sorted(priority_key(todo) for todo in store.pending.values())
+        store.by_due = sorted(due_key(todo) for todo in store.pending.values() if todo["due"])
+        return store
+
+    # Views
+    def pending_tasks(self):
+        return self.pending.values()
+
+    def pending_page(self, page, page_size):
+        """One page of pending tasks, oldest first."""
+        start = page * page_size
+        return list(islice(self.pending.values(), start, start + page_size))
+
+    def completed_page(self, page, page_size):
+        """One page of completed tasks, most recently completed first."""
+        start = page * page_size
+        return list(islice(reversed(self.completed.values()), start, start + page_size))
+
+    def recent_completed(self, limit=10):
+        """The last `limit` completed tasks, newest first."""
+        return list(islice(reversed(self.completed.values()), limit))
+
+    def priority_page(self, page, page_size):
+        """One page of pending tasks, High first and then by due date."""
+        start = page * page_size
+        with self._lock:
+            return [self.pending[key[-1]] for key in self.by_priority[start:start + page_size]]
+
+    def next_up(self, limit=3):
+        """The `limit` most urgent pending tasks."""
+        return self.priority_page(0, limit)
+
+    def overdue_count(self, today=None):
+        return bisect_left(self.by_due, (today or today_text(),))
+
+    def overdue(self, limit=5, today=None):
+        """Pending tasks due before today, the longest overdue first (at most `limit`)."""
+        with self._lock:
+            end = min(self.overdue_count(today), limit)
+            return [self.pending[key[-1]] for key in self.by_due[:end]]
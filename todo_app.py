@@ -1,5 +1,11 @@
+import html
+import uuid
+
 import streamlit as st
-from datetime import datetime
+from shared_lists import DEFAULT_LIST, SharedLists, VersionConflict
+from task_io import export_file, file_format, import_tasks
+from task_search import get_search_index
+from task_store import today_text
 
 st.set_page_config(
     page_title="To-Do List App", 
@@ -28,12 +34,63 @@ st.title("✅ To-Do List App")
 st.caption("Stay organized and get things done!")
 st.markdown("---")
 
+# Priority color coding
+priority_info = {
+    "High": {"emoji": "🔴", "color": "#dc3545"},
+    "Medium": {"emoji": "🟡", "color": "#ffc107"},
+    "Low": {"emoji": "🟢", "color": "#28a745"}
+}
+
+
+SYNC_SECONDS = 3  # how often a session checks for changes made by other sessions
+
+
+@st.cache_resource
+def get_shared_lists():
+    """Named lists saved on disk, shared by every session of this server process."""
+    return SharedLists()
+
+
 # Initialize session state
-if "todos" not in st.session_state:
-    st.session_state.todos = []
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:8]
+if "list_name" not in st.session_state:
+    st.session_state.list_name = DEFAULT_LIST
+if "todo_notice" not in st.session_state:
+    st.session_state.todo_notice = None
+
+lists = get_shared_lists()
 
-if "completed" not in st.session_state:
-    st.session_state.completed = []
+
+def create_list():
+    name = st.session_state.new_list_name.strip()
+    if name:
+        lists.create(name)
+        st.session_state.list_name = name
+        st.session_state.new_list_name = ""
+
+# Sidebar: which list to work on
+with st.sidebar:
+    st.header("📂 List")
+    list_names = lists.names()
+    if st.session_state.list_name not in list_names:
+        st.session_state.list_name = DEFAULT_LIST
+    st.selectbox("Shared list", list_names, key="list_name",
+                 help="Everyone using this app sees the same lists")
+    with st.popover("➕ New List", use_container_width=True):
+        st.text_input("List name", key="new_list_name")
+        st.button("Create", on_click=create_list)
+
+shared = lists.get(st.session_state.list_name)
+store = shared.store
+author = st.session_state.session_id
+
+# The version of the list this session has shown; changes are checked against it
+if st.session_state.get("seen_list") != shared.name:
+    st.session_state.seen_list = shared.name
+    st.session_state.seen_version = shared.version
+    st.session_state.pending_page = 0
+    st.session_state.completed_page = 0
 
 # Sidebar for adding new tasks
 with st.sidebar:
@@ -54,6 +111,12 @@ with st.sidebar:
     # Extract priority level
     priority_level = priority.split()[0]
     
+    due_date = st.date_input(
+        "Due Date (optional)",
+        value=None,
+        help="Tasks with a due date show up in Next Up and Overdue"
+    )
+    
     col1, col2 = st.columns(2)
     with col1:
         add_clicked = st.button("➕ Add", type="primary", use_container_width=True)
@@ -63,111 +126,280 @@ with st.sidebar:
     
     if add_clicked:
         if new_task.strip():
-            task_data = {
-                "id": len(st.session_state.todos) + len(st.session_state.completed) + 1,
-                "task": new_task.strip(),
-                "priority": priority_level,
-                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M")
-            }
-            st.session_state.todos.append(task_data)
+            shared.add(new_task.strip(), priority_level, due=due_date.isoformat() if due_date else None, author=author)
             st.success("✅ Task added!")
             st.rerun()
         else:
             st.warning("⚠️ Please enter a task description!")
     
     if clear_all:
-        if st.session_state.todos or st.session_state.completed:
-            st.session_state.todos = []
-            st.session_state.completed = []
-            st.success("🗑️ All tasks cleared!")
+        if store.total_count:
+            try:
+                shared.clear(st.session_state.seen_version, author=author)
+                st.success("🗑️ All tasks cleared!")
+            except VersionConflict as e:
+                st.session_state.todo_notice = f"⚠️ {e}"
             st.rerun()
     
-    st.markdown("---")
-    st.markdown("### 📊 Quick Stats")
-    st.metric("Total", len(st.session_state.todos) + len(st.session_state.completed))
-    st.metric("Pending", len(st.session_state.todos))
-    st.metric("Done", len(st.session_state.completed))
-
-# Main content area
-col1, col2 = st.columns(2)
-
-# Pending tasks
-with col1:
-    st.subheader(f"📋 Pending Tasks ({len(st.session_state.todos)})")
-    
-    if st.session_state.todos:
-        for todo in st.session_state.todos:
-            # Priority color coding
-            priority_info = {
-                "High": {"emoji": "🔴", "color": "#dc3545"},
-                "Medium": {"emoji": "🟡", "color": "#ffc107"},
-                "Low": {"emoji": "🟢", "color": "#28a745"}
-            }
-            
-            p_info = priority_info.get(todo['priority'], {"emoji": "⚪", "color": "#6c757d"})
-            
-            with st.container():
-                st.markdown(f"""
-                <div class="task-card">
-                    <h4 style="margin: 0;">
-                        {p_info['emoji']} {todo['task']}
-                    </h4>
-                    <p style="margin: 0.5rem 0 0 0; color: #666; font-size: 0.9em;">
-                        Priority: <strong style="color: {p_info['color']};">{todo['priority']}</strong> | 
-                        Created: {todo['created_at']}
+    with st.expander("📦 Import / Export"):
+        uploaded = st.file_uploader(
+            "Import tasks",
+            type=["csv", "jsonl", "json"],
+            help="Columns: task, priority, created_at, due and completed_at (the last three are optional)"
+        )
+        if uploaded is not None and st.button("📥 Import", use_container_width=True):
+            progress = st.progress(0.0, text="Importing...")
+            imported, skipped, errors = import_tasks(
+                shared, uploaded, file_format(uploaded.name), priority_info,
+                on_progress=lambda fraction: progress.progress(fraction, text=f"Importing... {fraction:.0%}"),
+                author=author
+            )
+            progress.empty()
+            st.success(f"✅ Imported {imported:,} tasks")
+            if skipped:
+                st.warning(f"⚠️ Skipped {skipped:,} rows")
+                st.caption("\n".join(f"- Line {line}: {problem}" for line, problem in errors))
+        
+        export_format = st.radio("Export format", ["csv", "jsonl"], horizontal=True)
+        st.download_button(
+            "📤 Export",
+            # Called only when the button is clicked, not on every rerun
+            data=lambda: export_file(store, export_format),
+            file_name=f"{shared.name}.{export_format}",
+            mime="text/csv" if export_format == "csv" else "application/x-ndjson",
+            on_click="ignore",
+            disabled=not store.total_count,
+            use_container_width=True
+        )
+    
+
+# Task lists are shown one page at a time
+PENDING_PER_PAGE = 20
+COMPLETED_PER_PAGE = 10
+SEARCH_RESULTS = 20
+
+if "pending_page" not in st.session_state:
+    st.session_state.pending_page = 0
+if "completed_page" not in st.session_state:
+    st.session_state.completed_page = 0
+if "pending_sort" not in st.session_state:
+    st.session_state.pending_sort = "Oldest first"
+
+
+def complete_task(task_id):
+    try:
+        shared.complete(task_id, st.session_state.seen_version, author=author)
+    except VersionConflict as e:
+        st.session_state.todo_notice = f"⚠️ {e}"
+
+
+def delete_task(task_id):
+    try:
+        shared.delete(task_id, st.session_state.seen_version, author=author)
+    except VersionConflict as e:
+        st.session_state.todo_notice = f"⚠️ {e}"
+
+
+def sync_changes():
+    """Catch up with the list: read only the changes since this session last looked."""
+    changes = shared.changes_since(st.session_state.seen_version)
+    if changes is None:
+        others = "Many"  # too far behind for the change log; the lists below are current anyway
+    else:
+        others = sum(1 for _, _, changed_by in changes if changed_by != author)
+    st.session_state.seen_version = shared.version
+    if others:
+        st.toast(f"🔄 {others} change(s) from other sessions")
+    if st.session_state.todo_notice:
+        st.toast(st.session_state.todo_notice)
+        st.session_state.todo_notice = None
+
+
+@st.fragment(run_every=SYNC_SECONDS)
+def watch_for_changes():
+    """Cheap check (one number) for changes by others; redraw the page only when there are some."""
+    if shared.version != st.session_state.seen_version:
+        st.rerun()
+
+
+def change_page(page_key, step):
+    st.session_state[page_key] += step
+
+
+def current_page(page_key, item_count, per_page):
+    """Keep the saved page number in range (tasks may have been removed) and return (page, page_count)."""
+    page_count = max(1, (item_count + per_page - 1) // per_page)
+    st.session_state[page_key] = min(max(st.session_state[page_key], 0), page_count - 1)
+    return st.session_state[page_key], page_count
+
+
+def task_line(todo, today):
+    """One-line summary of a task for the Next Up / Overdue lists."""
+    p_info = priority_info.get(todo['priority'], {"emoji": "⚪"})
+    due = todo.get('due')
+    if not due:
+        return f"- {p_info['emoji']} {todo['task']}"
+    late = " ⚠️" if due < today else ""
+    return f"- {p_info['emoji']} {todo['task']} · due {due}{late}"
+
+
+def page_controls(page_key, page, page_count):
+    if page_count <= 1:
+        return
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button("⬅️", key=f"{page_key}_prev", disabled=page == 0,
+                  on_click=change_page, args=(page_key, -1), use_container_width=True)
+    with col_page:
+        st.markdown(f"<p style='text-align: center;'>Page {page + 1} of {page_count}</p>", unsafe_allow_html=True)
+    with col_next:
+        st.button("➡️", key=f"{page_key}_next", disabled=page >= page_count - 1,
+                  on_click=change_page, args=(page_key, 1), use_container_width=True)
+
+
+@st.fragment
+def task_lists():
+    """Pending/completed lists and the counters.
+
+    This is a fragment: Complete, Delete and the page buttons only re-run
+    this function, not the whole app, and only the current page of each
+    list is drawn - so a click costs the same with 100 or 10,000 tasks.
+    """
+    sync_changes()
+    
+    with st.sidebar:
+        st.markdown("---")
+        st.markdown("### 📊 Quick Stats")
+        st.metric("Total", store.total_count)
+        st.metric("Pending", store.pending_count)
+        st.metric("Done", store.completed_count)
+    
+    today = today_text()
+    
+    # Search over every task, pending or done
+    query = st.text_input("🔍 Search tasks", placeholder="Words, priority or dates (e.g. milk, high, 2024-05)",
+                          key="task_search")
+    if query.strip():
+        results, match_count = get_search_index(store).search(query, SEARCH_RESULTS)
+        if match_count:
+            shown = f" (newest {len(results)} shown)" if match_count > len(results) else ""
+            st.caption(f"{match_count:,} matching tasks{shown}")
+            lines = []
+            for todo in results:
+                if todo['id'] in store.pending:
+                    lines.append(task_line(todo, today))
+                else:
+                    lines.append(f"- ✅ ~~{todo['task']}~~ · completed {todo.get('completed_at', 'N/A')}")
+            st.markdown("\n".join(lines))
+        else:
+            st.info("No tasks match your search.")
+        st.markdown("---")
+    
+    # What to do next (read straight from the store's sorted indexes)
+    if store.pending_count:
+        col_next, col_overdue = st.columns(2)
+        with col_next:
+            st.markdown("#### 🎯 Next Up")
+            st.markdown("\n".join(task_line(todo, today) for todo in store.next_up(3)))
+        with col_overdue:
+            overdue_count = store.overdue_count(today)
+            st.markdown(f"#### ⏰ Overdue ({overdue_count})")
+            if overdue_count:
+                st.markdown("\n".join(task_line(todo, today) for todo in store.overdue(5, today)))
+            else:
+                st.caption("Nothing overdue.")
+        st.markdown("---")
+    
+    # Main content area
+    col1, col2 = st.columns(2)
+    
+    # Pending tasks
+    with col1:
+        st.subheader(f"📋 Pending Tasks ({store.pending_count})")
+        
+        if store.pending_count:
+            sort_order = st.radio("Sort", ["Oldest first", "Priority"], key="pending_sort",
+                                  horizontal=True, label_visibility="collapsed")
+            page, page_count = current_page("pending_page", store.pending_count, PENDING_PER_PAGE)
+            if sort_order == "Priority":
+                page_tasks = store.priority_page(page, PENDING_PER_PAGE)
+            else:
+                page_tasks = store.pending_page(page, PENDING_PER_PAGE)
+            for todo in page_tasks:
+                p_info = priority_info.get(todo['priority'], {"emoji": "⚪", "color": "#6c757d"})
+                due = todo.get('due')
+                if due:
+                    due_color = "#dc3545" if due < today else "#666"
+                    due_text = f" | Due: <strong style=\"color: {due_color};\">{html.escape(due)}</strong>"
+                else:
+                    due_text = ""
+                
+                with st.container():
+                    st.markdown(f"""
+                    <div class="task-card">
+                        <h4 style="margin: 0;">
+                            {p_info['emoji']} {html.escape(todo['task'])}
+                        </h4>
+                        <p style="margin: 0.5rem 0 0 0; color: #666; font-size: 0.9em;">
+                            Priority: <strong style="color: {p_info['color']};">{todo['priority']}</strong> | 
+                            Created: {html.escape(todo['created_at'])}{due_text}
+                        </p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    col_a, col_b = st.columns([1, 1])
+                    with col_a:
+                        st.button("✓ Complete", key=f"complete_{todo['id']}", on_click=complete_task,
+                                  args=(todo['id'],), use_container_width=True)
+                    with col_b:
+                        st.button("🗑️ Delete", key=f"delete_{todo['id']}", on_click=delete_task,
+                                  args=(todo['id'],), use_container_width=True)
+                    
+                    st.markdown("<br>", unsafe_allow_html=True)
+            page_controls("pending_page", page, page_count)
+        else:
+            st.info("🎉 No pending tasks! Great job!")
+    
+    # Completed tasks
+    with col2:
+        st.subheader(f"✅ Completed Tasks ({store.completed_count})")
+        
+        if store.completed_count:
+            page, page_count = current_page("completed_page", store.completed_count, COMPLETED_PER_PAGE)
+            # The whole page goes out as one markdown element
+            cards = "".join(f"""
+                <div class="task-card completed-task">
+                    <p style="margin: 0; text-decoration: line-through;">
+                        ✓ {html.escape(todo['task'])}
+                    </p>
+                    <p style="margin: 0.5rem 0 0 0; color: #666; font-size: 0.85em;">
+                        Completed: {html.escape(todo.get('completed_at') or 'N/A')}
                     </p>
                 </div>
-                """, unsafe_allow_html=True)
-                
-                col_a, col_b = st.columns([1, 1])
-                with col_a:
-                    if st.button("✓ Complete", key=f"complete_{todo['id']}", use_container_width=True):
-                        todo['completed_at'] = datetime.now().strftime("%Y-%m-%d %H:%M")
-                        st.session_state.completed.append(todo)
-                        st.session_state.todos.remove(todo)
-                        st.rerun()
-                with col_b:
-                    if st.button("🗑️ Delete", key=f"delete_{todo['id']}", use_container_width=True):
-                        st.session_state.todos.remove(todo)
-                        st.rerun()
-                
-                st.markdown("<br>", unsafe_allow_html=True)
-    else:
-        st.info("🎉 No pending tasks! Great job!")
-
-# Completed tasks
-with col2:
-    st.subheader(f"✅ Completed Tasks ({len(st.session_state.completed)})")
-    
-    if st.session_state.completed:
-        for todo in reversed(st.session_state.completed[-10:]):  # Show last 10 completed
-            st.markdown(f"""
-            <div class="task-card completed-task">
-                <p style="margin: 0; text-decoration: line-through;">
-                    ✓ {todo['task']}
-                </p>
-                <p style="margin: 0.5rem 0 0 0; color: #666; font-size: 0.85em;">
-                    Completed: {todo.get('completed_at', 'N/A')}
-                </p>
-            </div>
-            """, unsafe_allow_html=True)
-            st.markdown("<br>", unsafe_allow_html=True)
-    else:
-        st.info("No completed tasks yet. Start checking off tasks!")
-
-# Bottom statistics bar
-if st.session_state.todos or st.session_state.completed:
-    st.markdown("---")
-    col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
-    
-    total = len(st.session_state.todos) + len(st.session_state.completed)
-    completion_rate = (len(st.session_state.completed) / total * 100) if total > 0 else 0
-    
-    with col_stat1:
-        st.metric("📝 Total Tasks", total)
-    with col_stat2:
-        st.metric("⏳ Pending", len(st.session_state.todos))
-    with col_stat3:
-        st.metric("✅ Completed", len(st.session_state.completed))
-    with col_stat4:
-        st.metric("📈 Completion Rate", f"{completion_rate:.1f}%")
+                <br>
+                """ for todo in store.completed_page(page, COMPLETED_PER_PAGE))
+            st.markdown(cards, unsafe_allow_html=True)
+            page_controls("completed_page", page, page_count)
+        else:
+            st.info("No completed tasks yet. Start checking off tasks!")
+    
+    # Bottom statistics bar
+    if store.total_count:
+        st.markdown("---")
+        col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
+        
+        total = store.total_count
+        completion_rate = (store.completed_count / total * 100) if total > 0 else 0
+        
+        with col_stat1:
+            st.metric("📝 Total Tasks", total)
+        with col_stat2:
+            st.metric("⏳ Pending", store.pending_count)
+        with col_stat3:
+            st.metric("✅ Completed", store.completed_count)
+        with col_stat4:
+            st.metric("📈 Completion Rate", f"{completion_rate:.1f}%")
+
+
+task_lists()
+watch_for_changes()
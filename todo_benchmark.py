@@ -0,0 +1,84 @@
+"""
+================================================================================
+TO-DO APP RERUN BENCHMARK
+================================================================================
+Measures how long one rerun of todo_app.py takes with 100, 1,000 and 10,000
+tasks, using Streamlit's built-in app tester (no browser needed).
+
+Because only one page of each task list is drawn, the time should stay about
+the same as the number of tasks grows.
+
+The lists are saved in a temporary folder (TODO_DATA_DIR), not in the
+app's real data folder, and deleted afterwards.
+
+Run it with:
+    python todo_benchmark.py
+================================================================================
+"""
+
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+# Must be set before task_journal is imported (by this file or the app)
+BENCHMARK_DIR = tempfile.mkdtemp(prefix="todo-benchmark-")
+os.environ["TODO_DATA_DIR"] = BENCHMARK_DIR
+
+from streamlit.testing.v1 import AppTest
+
+from shared_lists import SharedLists, list_dir
+from task_journal import write_snapshot
+from task_store import TaskStore
+
+TASK_COUNTS = [100, 1_000, 10_000]
+RUNS = 10
+
+
+def make_store(count):
+    """A store with `count` tasks: two thirds pending, one third completed."""
+    store = TaskStore()
+    priorities = ["Low", "Medium", "High"]
+    for i in range(count):
+        store.add(f"Benchmark task {i}", priorities[i % 3])
+    for task_id in range(1, count // 3 + 1):
+        store.complete(task_id)
+    return store
+
+
+def list_name(count):
+    return f"Benchmark {count:,}"
+
+
+def save_lists():
+    """Save one list per size where the app will look for it."""
+    lists = SharedLists(BENCHMARK_DIR)
+    for count in TASK_COUNTS:
+        lists.create(list_name(count))
+        path = list_dir(BENCHMARK_DIR, list_name(count))
+        os.makedirs(path, exist_ok=True)
+        write_snapshot(path, make_store(count), 1)
+
+
+def time_reruns(count):
+    app = AppTest.from_file("todo_app.py", default_timeout=60)
+    app.session_state.list_name = list_name(count)
+    app.run()  # first run (imports, page setup) is not counted
+
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        app.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+if __name__ == "__main__":
+    save_lists()
+    print(f"{'Tasks':>8} | {'median ms':>10} | {'min ms':>8} | {'max ms':>8}")
+    print("-" * 44)
+    for count in TASK_COUNTS:
+        timings = time_reruns(count)
+        print(f"{count:>8,} | {statistics.median(timings):>10.1f} | {min(timings):>8.1f} | {max(timings):>8.1f}")
+    shutil.rmtree(BENCHMARK_DIR, ignore_errors=True)